@@ -2,11 +2,9 @@ import streamlit as st
 import FinanceDataReader as fdr
 import pandas as pd
 import datetime
-import requests
 import json
 import os
 import time
-import base64
 import altair as alt
 from pykrx import stock
 import concurrent.futures
@@ -18,6 +16,22 @@ import urllib.parse
 import numpy as np
 from io import StringIO
 import random
+import copy
+from modules.price_store import load_history, load_price_panel, panel_history
+from modules.indicators import compute_indicators, add_indicators
+from modules.taskgraph import run_task_graph
+from modules.net import http_get, http_post
+from modules.naver import fetch_item_main
+from modules.investor_flow import get_investor_flow, investor_tail_sum
+from modules.gemini import generate_content, configure_scheduler, get_scheduler_metrics, PRIORITY_HOLDING, PRIORITY_NORMAL
+from modules.llm_cache import news_cache_key, cache_get, cache_set
+from modules.symbols import SymbolIndex
+from modules.krx_listing import load_listing, listing_version, refresh_listing
+from modules.themes import find_theme, themes_for_code
+from modules.github_store import GitHubStore
+from modules.storage import open_store, parse_replicas, CallableStore, store_status
+from modules.paths import data_path
+from modules.news import fetch_sources, dedupe_titles, strip_publisher, NEWS_SOURCE_TIMEOUT, KeywordMatcher
 
 # ------------------------------------------------------------------------------
 # [모듈 연결] 방금 만든 ui.py 파일에서 디자인 기능들을 가져옵니다.
@@ -40,6 +54,12 @@ except ImportError:
     st.error("❌ 'modules/ui.py' 파일을 찾을 수 없습니다. 깃허브에 파일이 있는지 확인해주세요!")
     st.stop()
 
+@st.cache_resource
+def setup_gemini_scheduler(rpm):
+    # 프로세스당 rpm 값마다 한 번만 설정 (rerun 마다 버킷을 다시 채우지 않음)
+    configure_scheduler(rpm)
+    return rpm
+
 # ==============================================================================
 # [보안 설정] Streamlit Secrets에서 키 가져오기 (절대 코드에 키를 적지 마세요!)
 # ==============================================================================
@@ -48,7 +68,13 @@ try:
     USER_TELEGRAM_TOKEN = st.secrets.get("TELEGRAM_TOKEN", "")
     USER_CHAT_ID = st.secrets.get("CHAT_ID", "")
     USER_GOOGLE_API_KEY = st.secrets.get("GOOGLE_API_KEY", "")
+    if st.secrets.get("GEMINI_RPM"): setup_gemini_scheduler(float(st.secrets.get("GEMINI_RPM")))
+    # 저장소 선택: github(기본) / sqlite / sheets / json, 복제본은 "github,sheets" 처럼 쉼표로
+    STORAGE_BACKEND = str(st.secrets.get("STORAGE_BACKEND", "github")).lower()
+    STORAGE_REPLICAS = parse_replicas(st.secrets.get("STORAGE_REPLICAS", ""))
 except Exception as e:
+    STORAGE_BACKEND = "github"
+    STORAGE_REPLICAS = []
     USER_GITHUB_TOKEN = ""
     USER_TELEGRAM_TOKEN = ""
     USER_CHAT_ID = ""
@@ -65,115 +91,67 @@ REPO_OWNER = "echobm101-del"
 REPO_NAME = "my_stock-bot"
 FILE_PATH = "my_watchlist_v7.json"
 
-@st.cache_data
 def get_krx_list_safe():
-    try:
-        df = fdr.StockListing('KRX')
-        if not df.empty: return df
-    except: pass 
+    # 디스크 스냅샷에서 즉시 로드, 거래일이 바뀌었으면 백그라운드 갱신 (modules/krx_listing.py)
+    return load_listing()
+
+@st.cache_resource(max_entries=2)
+def build_symbol_index(version):
+    return SymbolIndex(get_krx_list_safe())
+
+def get_symbol_index():
+    # 캐시된 인덱스를 쓰더라도 매번 거래일 확인 (날짜가 바뀌었으면 백그라운드 갱신 → 버전이 올라가면 새 인덱스)
+    load_listing()
+    return build_symbol_index(listing_version())
+
+symbol_index = get_symbol_index()
+
+@st.cache_resource
+def get_github_store(token):
+    # 프로세스 전체(모든 세션)가 공유: 메모리/디스크 사본 + SHA 캐시 + 저장 모아서 커밋 (modules/github_store.py)
+    return GitHubStore(token, REPO_OWNER, REPO_NAME, FILE_PATH, message="Update data via Streamlit App (V49.9)", mirror_path=data_path("github_mirror.json"))
+
+def _sheets_store():
+    from modules.db import load_db, save_db  # gspread 는 sheets 를 쓸 때만 필요
+    return CallableStore(load_db, save_db)
+
+@st.cache_resource
+def get_data_store():
+    # STORAGE_BACKEND 가 주 저장소, STORAGE_REPLICAS 는 백그라운드 복제 (modules/storage.py)
+    factories = {
+        "github": lambda: get_github_store(USER_GITHUB_TOKEN) if USER_GITHUB_TOKEN else None,
+        "sheets": _sheets_store,
+    }
+    return open_store(STORAGE_BACKEND, STORAGE_REPLICAS, factories)
 
+def load_data_store():
     try:
-        target_date = datetime.datetime.now()
-        for _ in range(5):
-            d_str = target_date.strftime("%Y%m%d")
-            try:
-                tickers = stock.get_market_ticker_list(d_str, market="KOSPI")
-                if tickers: break 
-            except: pass
-            target_date -= datetime.timedelta(days=1)
-        d_str = target_date.strftime("%Y%m%d")
-        df_kospi = stock.get_market_cap_by_ticker(d_str, market="KOSPI")
-        df_kosdaq = stock.get_market_cap_by_ticker(d_str, market="KOSDAQ")
-        df_list = []
-        if not df_kospi.empty:
-            df_kospi = df_kospi.reset_index()
-            df_list.append(df_kospi[['티커', '종목명']].rename(columns={'티커': 'Code', '종목명': 'Name'}))
-        if not df_kosdaq.empty:
-            df_kosdaq = df_kosdaq.reset_index()
-            df_list.append(df_kosdaq[['티커', '종목명']].rename(columns={'티커': 'Code', '종목명': 'Name'}))
-        if df_list: return pd.concat(df_list, ignore_index=True)
-    except Exception as e: pass
-    return pd.DataFrame() 
-
-krx_df = get_krx_list_safe()
-
-def load_from_github():
-    try:
-        token = USER_GITHUB_TOKEN
-        if not token: return {"portfolio": {}, "watchlist": {}}
-        url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/contents/{FILE_PATH}"
-        headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json"}
-        r = requests.get(url, headers=headers)
-        if r.status_code == 200:
-            content = base64.b64decode(r.json()['content']).decode('utf-8')
-            data = json.loads(content)
-            if "portfolio" not in data and "watchlist" not in data:
-                return {"portfolio": {}, "watchlist": data}
-            return data
-        return {"portfolio": {}, "watchlist": {}}
+        data = get_data_store().load()
+        # 이 세션이 수정을 시작한 기준본 (저장 시 다른 세션 변경분과 병합할 때 사용)
+        st.session_state['data_base'] = copy.deepcopy(data)
+        return data
     except: return {"portfolio": {}, "watchlist": {}}
 
-def update_github_file(new_data):
+def save_data_store(new_data, wait=False):
+    # 기본은 저장소에 맡기고 바로 돌아옴 (연속 클릭은 한 번에 커밋, 대기/실패는 사이드바 상태 표시)
+    # wait=True 면 커밋 결과까지 기다림. False 는 직전 커밋이 실패 중이라는 뜻 (실패분은 계속 재시도)
     try:
-        token = USER_GITHUB_TOKEN
-        if not token: return False
-        url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/contents/{FILE_PATH}"
-        headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json"}
-        r_get = requests.get(url, headers=headers)
-        if r_get.status_code == 200:
-            sha = r_get.json().get('sha')
-        else:
-            sha = None
-        json_str = json.dumps(new_data, ensure_ascii=False, indent=4)
-        b64_content = base64.b64encode(json_str.encode('utf-8')).decode('utf-8')
-        data = {
-            "message": "Update data via Streamlit App (V49.9)",
-            "content": b64_content
-        }
-        if sha: data["sha"] = sha
-        r_put = requests.put(url, headers=headers, json=data)
-        return r_put.status_code in [200, 201]
+        ok = get_data_store().save(new_data, base=st.session_state.get('data_base'), wait=wait)
+        if ok: st.session_state['data_base'] = copy.deepcopy(new_data)
+        return ok
     except Exception as e:
-        print(f"GitHub Save Error: {e}")
+        print(f"Data Save Error: {e}")
         return False
 
-if 'data_store' not in st.session_state: st.session_state['data_store'] = load_from_github()
+if 'data_store' not in st.session_state: st.session_state['data_store'] = load_data_store()
 if 'preview_list' not in st.session_state: st.session_state['preview_list'] = []
 if 'current_theme_name' not in st.session_state: st.session_state['current_theme_name'] = ""
 
-@st.cache_data(ttl=1800)
 def get_naver_theme_stocks(keyword):
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    target_link = None
-    for page in range(1, 8):
-        base_url = f"https://finance.naver.com/sise/theme.naver?&page={page}"
-        try:
-            res = requests.get(base_url, headers=headers)
-            res.encoding = 'EUC-KR' 
-            soup = BeautifulSoup(res.text, 'html.parser')
-            themes = soup.select('table.type_1 tr td.col_type1 a')
-            for t in themes:
-                if keyword.strip() in t.text.strip():
-                    target_link = "https://finance.naver.com" + t['href']
-                    break
-            if target_link: break
-        except: continue
-    if not target_link: return [], f"네이버 금융 테마에서 '{keyword}'를 찾을 수 없습니다."
+    # 테마 인덱스(modules/themes.py)에서 메모리 조회
     try:
-        res_detail = requests.get(target_link, headers=headers)
-        res_detail.encoding = 'EUC-KR'
-        soup_detail = BeautifulSoup(res_detail.text, 'html.parser')
-        stocks = []
-        rows = soup_detail.select('div.box_type_l table.type_5 tr')
-        for row in rows:
-            name_tag = row.select_one('td.name a')
-            if name_tag:
-                code = name_tag['href'].split('=')[-1]
-                name = name_tag.text.strip()
-                price_txt = row.select('td.number')[0].text.strip().replace(',', '')
-                try: price = int(price_txt)
-                except: price = 0
-                stocks.append({"code": code, "name": name, "price": price})
+        theme_name, stocks = find_theme(keyword)
+        if not theme_name: return [], f"네이버 금융 테마에서 '{keyword}'를 찾을 수 없습니다."
         return stocks, f"'{keyword}' 관련 테마 발견: {len(stocks)}개 종목"
     except Exception as e: return [], f"크롤링 오류: {str(e)}"
 
@@ -181,7 +159,7 @@ def get_investor_trend_from_naver(code):
     try:
         url = f"https://finance.naver.com/item/frgn.naver?code={code}"
         headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers)
+        res = http_get(url, headers=headers)
         try: dfs = pd.read_html(StringIO(res.text), match='날짜', header=0, encoding='euc-kr')
         except: dfs = pd.read_html(StringIO(res.text), header=0, encoding='euc-kr')
         target_df = None
@@ -214,9 +192,7 @@ def get_investor_trend_from_naver(code):
 @st.cache_data(ttl=3600)
 def get_investor_trend(code):
     try:
-        end_d = datetime.datetime.now().strftime("%Y%m%d")
-        start_d = (datetime.datetime.now() - datetime.timedelta(days=100)).strftime("%Y%m%d")
-        df = stock.get_market_investor_net_purchase_by_date(start_d, end_d, code)
+        df = get_investor_flow(code)
         if not df.empty:
             df = df.tail(60).copy()
             df['Cum_Individual'] = df['개인'].cumsum()
@@ -227,81 +203,37 @@ def get_investor_trend(code):
     except: pass
     return get_investor_trend_from_naver(code)
 
-@st.cache_data(ttl=3600)
-def get_financial_history(code):
-    try:
-        url = f"https://finance.naver.com/item/main.naver?code={code}"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers)
-        df_list = pd.read_html(StringIO(res.text), encoding='euc-kr')
-        for df in df_list:
-            if '최근 연간 실적' in str(df.columns) or '매출액' in str(df.iloc[:,0].values):
-                df = df.set_index(df.columns[0])
-                fin_data = []
-                cols = df.columns[-5:-1]
-                for col in cols:
-                    try:
-                        col_name = col[1] if isinstance(col, tuple) else col
-                        val_sales = df.loc['매출액', col] if '매출액' in df.index else 0
-                        val_op = df.loc['영업이익', col] if '영업이익' in df.index else 0
-                        val_net = df.loc['당기순이익', col] if '당기순이익' in df.index else 0
-                        fin_data.append({
-                            "Date": str(col_name).strip(),
-                            "매출액": float(val_sales) if val_sales != '-' and pd.notnull(val_sales) else 0,
-                            "영업이익": float(val_op) if val_op != '-' and pd.notnull(val_op) else 0,
-                            "당기순이익": float(val_net) if val_net != '-' and pd.notnull(val_net) else 0
-                        })
-                    except: continue
-                return pd.DataFrame(fin_data)
-        return pd.DataFrame()
-    except: return pd.DataFrame()
-
-def calculate_rsi(data, window=14):
-    delta = data.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
-def calculate_macd(data, short=12, long=26, signal=9):
-    short_ema = data.ewm(span=short, adjust=False).mean()
-    long_ema = data.ewm(span=long, adjust=False).mean()
-    macd = short_ema - long_ema
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
-    return macd, signal_line
-
-def calculate_atr(data, window=14):
-    try:
-        high = data['High']
-        low = data['Low']
-        close = data['Close']
-        prev_close = close.shift(1)
-        tr1 = high - low
-        tr2 = (high - prev_close).abs()
-        tr3 = (low - prev_close).abs()
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=window).mean()
-        return atr
-    except: return pd.Series(0, index=data.index)
-
-def backtest_strategy(df):
+@st.cache_data(ttl=1200)
+def get_item_main_page(code):
+    # 종목 메인 페이지는 한 번만 받아서 재무표/PER/PBR 을 함께 파싱 (펀더멘탈 점수와 재무표가 공유)
+    # 조회 실패는 예외로 올라와서 캐시되지 않음 (다음 호출에서 다시 시도)
+    return fetch_item_main(code)
+
+def get_item_main_page_or_none(code):
+    # analyze_pro 작업 그래프용: 실패해도 펀더멘탈은 다른 출처 값으로 계산되도록 None 으로 넘김
+    try: return get_item_main_page(code)
+    except Exception as e:
+        print(f"Naver item page error ({code}): {e}")
+        return None
+
+def annual_from_page(page):
+    if page is None: raise Exception("종목 메인 페이지 조회 실패")
+    return page['annual']
+
+def default_entry_rule(df):
+    return (df['Close'] > df['MA20']) & (df['RSI'] < 40)
+
+def backtest_strategy(df, hold_days=10, profit_target=0.03, entry_rule=default_entry_rule):
     try:
-        sim_df = df.copy()
-        sim_df['Signal'] = (sim_df['Close'] > sim_df['MA20']) & (sim_df['RSI'] < 40)
-        signals = sim_df[sim_df['Signal']].index
-        wins = 0
-        total = 0
-        for date in signals:
-            try:
-                idx = sim_df.index.get_loc(date)
-                future = sim_df.iloc[idx+1:idx+11]
-                if len(future) < 1: continue
-                buy_price = sim_df.loc[date, 'Close']
-                max_price = future['High'].max()
-                if max_price >= buy_price * 1.03: 
-                    wins += 1
-                total += 1
-            except: continue
+        signal = entry_rule(df).fillna(False).to_numpy(dtype=bool)
+        close = df['Close'].to_numpy(dtype=float)
+        high = df['High'].to_numpy(dtype=float)
+        # 각 날짜 다음날부터 hold_days 동안의 최고가: 뒤집어서 rolling max 후 하루 당김
+        fwd_max = pd.Series(high[::-1]).rolling(hold_days, min_periods=1).max().to_numpy()[::-1]
+        fwd_max = np.append(fwd_max[1:], np.nan)
+        valid = signal & ~np.isnan(fwd_max)
+        total = int(valid.sum())
+        wins = int((fwd_max[valid] >= close[valid] * (1 + profit_target)).sum())
         win_rate = int((wins / total) * 100) if total > 0 else 0
         return win_rate
     except: return 0
@@ -316,21 +248,17 @@ def get_market_cycle_status(code):
         else: return "📉 시장 하락세 (보수적 접근 필요)"
     except: return "시장 분석 중"
 
-def calculate_sniper_score(code):
+@st.cache_data(ttl=300)
+def get_price_panel(codes):
+    # 시세 패널 + 전 종목 지표를 한 번에 계산 (종목별 rolling 반복 없음)
+    return compute_indicators(load_price_panel(codes, days=365))
+
+def calculate_sniper_score(code, history=None):
     try:
-        df = fdr.DataReader(code, datetime.datetime.now() - datetime.timedelta(days=365))
+        df = history.copy() if history is not None else load_history(code, days=365)
         if df.empty or len(df) < 60: return 0, [], 0, 0, 0, pd.DataFrame(), ""
         
-        df['MA20'] = df['Close'].rolling(20).mean()
-        df['MA60'] = df['Close'].rolling(60).mean()
-        df['MA120'] = df['Close'].rolling(120).mean()
-        df['MA240'] = df['Close'].rolling(240).mean()
-        df['MA5'] = df['Close'].rolling(5).mean()
-        df['RSI'] = calculate_rsi(df['Close'])
-        df['ATR'] = calculate_atr(df)
-        df['MACD'], df['MACD_Signal'] = calculate_macd(df['Close'])
-        df['BB_Upper'] = df['MA20'] + (df['Close'].rolling(20).std() * 2)
-        df['BB_Lower'] = df['MA20'] - (df['Close'].rolling(20).std() * 2)
+        if 'MACD_Signal' not in df.columns: df = add_indicators(df)
         
         curr = df.iloc[-1]
         prev = df.iloc[-2]
@@ -400,30 +328,19 @@ def get_macro_data():
     if all(v['val'] == 0.0 for v in results.values()): return None
     return results
 
-@st.cache_data(ttl=1200)
-def get_company_guide_score(code):
+def get_company_guide_score(code, page):
+    # page: 이미 받아 둔 메인 페이지 (None 이면 조회 실패 → 다시 받지 않고 대체 출처 값으로)
+    # 대체 출처 조회와 채점은 페이지 값을 키로 캐시
     per, pbr, div = 0.0, 0.0, 0.0
-    try:
-        url = f"https://finance.naver.com/item/main.naver?code={code}"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers)
-        if res.status_code == 200:
-            soup = BeautifulSoup(res.text, 'html.parser')
-            def get_val_by_id(id_name):
-                tag = soup.select_one(f"#{id_name}")
-                if tag:
-                    txt = tag.text.replace(',', '').replace('%', '').replace('배', '').strip()
-                    try: return float(txt)
-                    except: return 0.0
-                return 0.0
-            per = get_val_by_id("_per")
-            pbr = get_val_by_id("_pbr")
-            div = get_val_by_id("_dvr")
-    except: pass
+    if page is not None: per, pbr, div = page['per'], page['pbr'], page['div']
+    return score_company_guide(code, per, pbr, div)
+
+@st.cache_data(ttl=1200)
+def score_company_guide(code, per, pbr, div):
     if per == 0 and pbr == 0:
-        if not krx_df.empty and code in krx_df['Code'].values:
+        if symbol_index.has_code(code):
             try:
-                row = krx_df[krx_df['Code'] == code].iloc[0]
+                row = symbol_index.row(code)
                 per = float(row.get('PER', 0)) if pd.notnull(row.get('PER')) else 0
                 pbr = float(row.get('PBR', 0)) if pd.notnull(row.get('PBR')) else 0
                 div = float(row.get('DividendYield', 0)) if pd.notnull(row.get('DividendYield')) else 0
@@ -452,64 +369,31 @@ def get_company_guide_score(code):
     fund_data = {"per": {"val": per, "stat": per_stat, "txt": per_txt}, "pbr": {"val": pbr, "stat": pbr_stat, "txt": pbr_txt}, "div": {"val": div, "stat": div_stat, "txt": div_txt}}
     return min(score, 50), "분석완료", fund_data
 
+NEWS_POS_WORDS = ["상승", "급등", "최고", "호재", "개선", "성장", "흑자", "수주", "돌파", "기대", "매수"]
+NEWS_NEG_WORDS = ["하락", "급락", "최저", "악재", "우려", "감소", "적자", "이탈", "매도", "공매도"]
+NEWS_SC_POS = ["공급 안정", "수율 개선", "장기 계약", "원가 절감", "공장 가동"]
+NEWS_SC_NEG = ["공급난", "품귀", "물류 대란", "원자재 상승", "지연", "숏티지", "부족"]
+NEWS_KEYWORD_WEIGHTS = {
+    **{w: 1 for w in NEWS_POS_WORDS}, **{w: -1 for w in NEWS_NEG_WORDS},
+    **{w: 2 for w in NEWS_SC_POS}, **{w: -2 for w in NEWS_SC_NEG},
+}
+NEWS_SUPPLY_CHAIN_WORDS = set(NEWS_SC_POS) | set(NEWS_SC_NEG)
+NEWS_MATCHER = KeywordMatcher(NEWS_KEYWORD_WEIGHTS)
+
 def analyze_news_by_keywords(news_titles):
-    pos_words = ["상승", "급등", "최고", "호재", "개선", "성장", "흑자", "수주", "돌파", "기대", "매수"]
-    neg_words = ["하락", "급락", "최저", "악재", "우려", "감소", "적자", "이탈", "매도", "공매도"]
-    sc_pos = ["공급 안정", "수율 개선", "장기 계약", "원가 절감", "공장 가동"]
-    sc_neg = ["공급난", "품귀", "물류 대란", "원자재 상승", "지연", "숏티지", "부족"]
+    hits = [w for _, w in NEWS_MATCHER.find(news_titles)]
+    score = sum(NEWS_KEYWORD_WEIGHTS[w] for w in hits)
+    sc_detected = any(w in NEWS_SUPPLY_CHAIN_WORDS for w in hits)
 
-    score = 0; found_keywords = []
-    sc_detected = False
-    
-    for title in news_titles:
-        for w in pos_words:
-            if w in title: score += 1; found_keywords.append(w)
-        for w in neg_words:
-            if w in title: score -= 1; found_keywords.append(w)
-        for w in sc_pos:
-            if w in title: score += 2; found_keywords.append(w); sc_detected=True
-        for w in sc_neg:
-            if w in title: score -= 2; found_keywords.append(w); sc_detected=True
-            
     final_score = min(max(score, -10), 10)
-    summary = f"긍정 키워드 {len([w for w in found_keywords if w in pos_words or w in sc_pos])}개, 부정 키워드 {len([w for w in found_keywords if w in neg_words or w in sc_neg])}개 감지."
+    summary = f"긍정 키워드 {sum(1 for w in hits if NEWS_KEYWORD_WEIGHTS[w] > 0)}개, 부정 키워드 {sum(1 for w in hits if NEWS_KEYWORD_WEIGHTS[w] < 0)}개 감지."
     if sc_detected: summary += " [공급망 이슈 감지]"
     return final_score, summary, "키워드 분석", ""
 
-def get_valid_model_name(api_key):
-    url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            chat_models = [m['name'] for m in models if 'generateContent' in m.get('supportedGenerationMethods', [])]
-            preferences = ['models/gemini-1.5-flash', 'models/gemini-1.5-pro', 'models/gemini-pro']
-            for pref in preferences:
-                if pref in chat_models: return pref
-            if chat_models: return chat_models[0]
-    except: pass
-    return "models/gemini-pro"
-
-def call_gemini_dynamic(prompt):
+def call_gemini_dynamic(prompt, priority=PRIORITY_NORMAL):
     api_key = USER_GOOGLE_API_KEY
     if not api_key: return None, "NO_KEY"
-    
-    model_name = get_valid_model_name(api_key)
-    clean_model_name = model_name.replace("models/", "")
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{clean_model_name}:generateContent?key={api_key}"
-    headers = {"Content-Type": "application/json"}
-    
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {"temperature": 0.0}
-    }
-    
-    try:
-        res = requests.post(url, headers=headers, json=payload, timeout=30)
-        if res.status_code == 200: return res.json(), None
-        elif res.status_code == 429: time.sleep(1); return None, "Rate Limit"
-        else: return None, f"HTTP {res.status_code}: {res.text}"
-    except Exception as e: return None, f"Connection Error: {str(e)}"
+    return generate_content(api_key, prompt, priority=priority)
 
 def get_ai_recommended_stocks(keyword):
     prompt = f"""
@@ -548,7 +432,7 @@ def get_naver_finance_news(code):
     try:
         url = f"https://finance.naver.com/item/news_news.naver?code={code}"
         headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers)
+        res = http_get(url, headers=headers, timeout=(3, NEWS_SOURCE_TIMEOUT), retry=False)
         soup = BeautifulSoup(res.text, 'html.parser')
         items = soup.select('.title') 
         for item in items:
@@ -562,7 +446,7 @@ def get_naver_search_news(keyword):
     try:
         url = f"https://search.naver.com/search.naver?where=news&query={urllib.parse.quote(keyword)}"
         headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers)
+        res = http_get(url, headers=headers, timeout=(3, NEWS_SOURCE_TIMEOUT), retry=False)
         soup = BeautifulSoup(res.text, 'html.parser')
         items = soup.select('.news_tit')
         for item in items:
@@ -571,36 +455,76 @@ def get_naver_search_news(keyword):
     except: pass
     return titles[:5]
 
-@st.cache_data(ttl=600)
-def get_news_sentiment_llm(company_name, stock_data_context=None):
-    if stock_data_context is None: stock_data_context = {}
-    news_titles = []; news_data = []
-    
+def get_google_news(company_name):
+    news_data = []
     try:
         query = f"{company_name} 주가"
         encoded_query = urllib.parse.quote(query)
         base_url = "https://news.google.com/rss/search"
         rss_url = base_url + f"?q={encoded_query}&hl=ko&gl=KR&ceid=KR:ko"
-        feed = feedparser.parse(rss_url)
+        feed = feedparser.parse(http_get(rss_url, timeout=(3, NEWS_SOURCE_TIMEOUT), retry=False).content)
         for entry in feed.entries[:5]:
             date_str = time.strftime("%Y-%m-%d", entry.published_parsed) if entry.published_parsed else ""
-            news_data.append({"title": entry.title, "link": entry.link, "date": date_str})
-            news_titles.append(entry.title)
+            # 제목 끝의 " - 언론사" 는 피드의 언론사 이름과 같을 때만 뗌 (중복 제거 비교용)
+            publisher = (entry.get('source') or {}).get('title', '')
+            news_data.append({"title": strip_publisher(entry.title, publisher), "link": entry.link, "date": date_str})
     except: pass
+    return news_data
 
-    code = stock_data_context.get('code', '')
-    if code:
-        naver_fin_titles = get_naver_finance_news(code)
-        news_titles.extend(naver_fin_titles)
+@st.cache_data(ttl=600)
+def collect_news(company_name, code=''):
+    # 세 소스를 동시에 받아서 (가장 느린 소스만큼만 기다림) 비슷한 제목은 하나만 남김
+    sources = {"google": lambda: get_google_news(company_name), "search": lambda: get_naver_search_news(company_name)}
+    if code: sources["finance"] = lambda: get_naver_finance_news(code)
+    fetched = fetch_sources(sources)
+
+    news_data = fetched.get("google") or []
+    news_titles = [n['title'] for n in news_data]
+    news_titles.extend(fetched.get("finance") or [])
+    news_titles.extend(fetched.get("search") or [])
+
+    news_titles = dedupe_titles(news_titles)
+    return news_titles, news_data
+
+def build_supply_hint(stock_data_context):
+    supply_analysis_hint = []
+    
+    usd_krw_change = stock_data_context.get('usd_krw_change', 0.0)
+    if usd_krw_change > 0.5: supply_analysis_hint.append(f"원/달러 환율 급등(+{usd_krw_change:.2f}%)으로 인한 외국인 환차손 회피 매물 가능성")
+    elif usd_krw_change < -0.5: supply_analysis_hint.append("환율 하락으로 인한 외국인 수급 개선 기대")
     
-    naver_search_titles = get_naver_search_news(company_name)
-    news_titles.extend(naver_search_titles)
+    price_surge = stock_data_context.get('price_surge', 0.0)
+    if price_surge > 15: supply_analysis_hint.append(f"단기 급등(+{price_surge:.1f}%)에 따른 기관/외인의 차익 실현 욕구 증가")
+    
+    round_fig_msg = stock_data_context.get('round_figure_msg', "")
+    if round_fig_msg: supply_analysis_hint.append(round_fig_msg)
+    
+    return "\n".join(supply_analysis_hint) if supply_analysis_hint else "특이사항 없음"
+
+def news_result_from_json(js):
+    return {
+        "score": js.get('score', 0),
+        "supply_score": js.get('supply_score', 0),
+        "headline": js.get('summary', "분석 결과 없음"),
+        "method": "ai",
+        "catalyst": js.get('catalyst', ""),
+        "opinion": js.get('opinion', "중립"),
+        "risk": js.get('risk', "특이사항 없음")
+    }
 
-    news_titles = list(set(news_titles))
+def get_news_sentiment_llm(company_name, stock_data_context=None, collected=None):
+    if stock_data_context is None: stock_data_context = {}
+    if collected is None: collected = collect_news(company_name, stock_data_context.get('code', ''))
+    news_titles, news_data = collected
 
     if not news_titles: 
         return {"score": 0, "headline": "관련 뉴스 없음", "raw_news": [], "method": "none", "catalyst": "", "opinion": "중립", "risk": "", "supply_score": 0}
 
+    # 같은 헤드라인 + 비슷한 상황이면 디스크 캐시의 AI 답변을 재사용 (세션/재시작 간 공유)
+    cache_key = news_cache_key(company_name, news_titles, stock_data_context)
+    cached = cache_get(cache_key)
+    if cached: return {**cached, "raw_news": news_data}
+
     try:
         if not USER_GOOGLE_API_KEY: raise Exception("API Key가 설정되지 않았습니다.")
         
@@ -610,20 +534,7 @@ def get_news_sentiment_llm(company_name, stock_data_context=None):
         profit_rate = stock_data_context.get('profit_rate', 0.0)
         quant_signal = stock_data_context.get('quant_signal', '중립')
         current_price = stock_data_context.get('current_price', 0)
-        
-        supply_analysis_hint = []
-        
-        usd_krw_change = stock_data_context.get('usd_krw_change', 0.0)
-        if usd_krw_change > 0.5: supply_analysis_hint.append(f"원/달러 환율 급등(+{usd_krw_change:.2f}%)으로 인한 외국인 환차손 회피 매물 가능성")
-        elif usd_krw_change < -0.5: supply_analysis_hint.append("환율 하락으로 인한 외국인 수급 개선 기대")
-        
-        price_surge = stock_data_context.get('price_surge', 0.0)
-        if price_surge > 15: supply_analysis_hint.append(f"단기 급등(+{price_surge:.1f}%)에 따른 기관/외인의 차익 실현 욕구 증가")
-        
-        round_fig_msg = stock_data_context.get('round_figure_msg', "")
-        if round_fig_msg: supply_analysis_hint.append(round_fig_msg)
-        
-        hint_str = "\n".join(supply_analysis_hint) if supply_analysis_hint else "특이사항 없음"
+        hint_str = build_supply_hint(stock_data_context)
 
         if is_holding:
             role_prompt = f"""
@@ -682,7 +593,7 @@ def get_news_sentiment_llm(company_name, stock_data_context=None):
         }}
         """
         
-        res_data, error_msg = call_gemini_dynamic(prompt)
+        res_data, error_msg = call_gemini_dynamic(prompt, PRIORITY_HOLDING if is_holding else PRIORITY_NORMAL)
         
         if res_data and 'candidates' in res_data and res_data['candidates']:
             raw = res_data['candidates'][0]['content']['parts'][0]['text']
@@ -697,29 +608,136 @@ def get_news_sentiment_llm(company_name, stock_data_context=None):
                 else:
                     raise Exception("AI 응답에서 JSON 데이터를 추출할 수 없습니다.")
 
-            return {
-                "score": js.get('score', 0),
-                "supply_score": js.get('supply_score', 0),
-                "headline": js.get('summary', "분석 결과 없음"),
-                "raw_news": news_data,
-                "method": "ai",
-                "catalyst": js.get('catalyst', ""),
-                "opinion": js.get('opinion', "중립"),
-                "risk": js.get('risk', "특이사항 없음")
-            }
+            result = news_result_from_json(js)
+            cache_set(cache_key, result)
+            return {**result, "raw_news": news_data}
         else: raise Exception(error_msg)
         
     except Exception as e:
-        score, summary, _, _ = analyze_news_by_keywords(news_titles)
-        return {"score": score, "supply_score": 0, "headline": f"{summary} (AI 분석 실패: {str(e)})", "raw_news": news_data, "method": "keyword", "catalyst": "키워드", "opinion": "관망", "risk": "API 오류"}
+        return keyword_news_result(news_titles, news_data, e)
+
+def keyword_news_result(news_titles, news_data, error):
+    score, summary, _, _ = analyze_news_by_keywords(news_titles)
+    return {"score": score, "supply_score": 0, "headline": f"{summary} (AI 분석 실패: {str(error)})", "raw_news": news_data, "method": "keyword", "catalyst": "키워드", "opinion": "관망", "risk": "API 오류"}
+
+# ------------------------------------------------------------------------------
+# [일괄 AI 분석] 여러 종목의 뉴스/컨텍스트를 프롬프트 하나에 담아 한 번에 요청
+# 응답(JSON 배열)을 종목코드로 매칭하고, 해석 실패/누락 종목은 종목별 호출로 대체합니다.
+# 요청 자체가 실패하면(429/대기 시간 초과 등) 종목별로 다시 부르지 않고 키워드 분석으로 답합니다.
+# ------------------------------------------------------------------------------
+NEWS_BATCH_SIZE = 10
+
+def build_batch_news_prompt(items):
+    blocks = []
+    for i, (name, ctx, titles) in enumerate(items, 1):
+        if ctx.get('is_holding'):
+            position = f"보유 중 (수익률 {ctx.get('profit_rate', 0.0):.2f}%, 퀀트 신호: {ctx.get('quant_signal', '중립')})"
+        else:
+            position = "신규 진입 검토"
+        blocks.append(f"""
+        [종목 {i}] {name} (code: {ctx.get('code', '')})
+        - 현재 주가: {ctx.get('current_price', 0):,}원 / 포지션: {position}
+        - 기술적 추세: {ctx.get('trend', '분석중')} / 시장 사이클: {ctx.get('cycle', '정보없음')}
+        - 수급 특이사항: {build_supply_hint(ctx)}
+        - 뉴스 헤드라인: {str(titles)}
+        """)
+
+    return f"""
+        당신은 30년 경력의 글로벌 헤지펀드 수석 전략가입니다.
+        아래 {len(items)}개 종목을 각각 독립적으로 분석하세요.
+        {''.join(blocks)}
+        [분석 지침]
+        1. 다양한 출처의 뉴스를 종합하여 '공급망 이슈', '반도체/AI 사이클', '사회적 관심도'를 파악하세요.
+        2. 단순 등락보다는 기업의 **본질적인 가치 변화**에 주목하세요.
+        3. 보유 중인 종목은 현재 주가 기준의 실전 대응 전략(익절/홀딩)을, 나머지는 신규 진입 전략을 제시하세요.
+        4. **절대 서론이나 부가 설명 없이 오직 JSON 배열만 출력하세요.**
+
+        [출력 형식 (반드시 JSON 배열, 종목마다 원소 1개)]
+        [
+            {{
+                "code": "위에 적힌 code 그대로",
+                "score": (정수 -10 ~ 10, 뉴스 종합 점수),
+                "supply_score": (정수 -5 ~ 5, 산업 사이클/공급망 영향 점수),
+                "opinion": "보유 중: 🚨 홀딩 (추가 상승 기대) / 💰 부분 익절 (리스크 관리) / 🛡️ 전량 익절 (추세 꺾임) / 💧 버티기 (물타기 금지) / ✂️ 손절매 | 신규 진입: 강력매수 / 매수 / 관망 / 비중축소 / 매도",
+                "summary": "핵심 분석 코멘트 (한 문장)",
+                "catalyst": "주가 핵심 재료 (5단어 이내)",
+                "risk": "잠재적 리스크 (1문장)"
+            }}
+        ]
+        """
+
+def parse_batch_news(raw):
+    cleaned = raw.replace("```json", "").replace("```", "").strip()
+    try: arr = json.loads(cleaned)
+    except:
+        match = re.search(r'\[.*\]', cleaned, re.DOTALL)
+        if not match: return {}
+        arr = json.loads(match.group())
+    if not isinstance(arr, list): return {}
+    parsed = {}
+    for item in arr:
+        if not isinstance(item, dict) or not item.get('code'): continue
+        key = str(item['code']).strip()
+        parsed[key.zfill(6) if key.isdigit() else key] = item
+    return parsed
+
+def get_news_sentiment_batch(news_requests):
+    # news_requests: [{"name", "context", "collected"}, ...] -> {종목코드: news dict}
+    results = {}; todo = []; fallback = []
+    for req in news_requests:
+        name, ctx = req['name'], req.get('context') or {}
+        code = ctx.get('code', '')
+        collected = req.get('collected') or collect_news(name, code)
+        news_titles, news_data = collected
+        if not news_titles or not USER_GOOGLE_API_KEY:
+            fallback.append((name, ctx, collected)); continue
+        cache_key = news_cache_key(name, news_titles, ctx)
+        cached = cache_get(cache_key)
+        if cached: results[code] = {**cached, "raw_news": news_data}
+        else: todo.append((name, ctx, collected, cache_key))
+
+    for start in range(0, len(todo), NEWS_BATCH_SIZE):
+        chunk = todo[start:start + NEWS_BATCH_SIZE]
+        parsed = {}; error = None
+        try:
+            prompt = build_batch_news_prompt([(name, ctx, collected[0]) for name, ctx, collected, _ in chunk])
+            held = any(ctx.get('is_holding') for _, ctx, _, _ in chunk)
+            res_data, error = call_gemini_dynamic(prompt, PRIORITY_HOLDING if held else PRIORITY_NORMAL)
+            if res_data and res_data.get('candidates'):
+                error = None
+                try: parsed = parse_batch_news(res_data['candidates'][0]['content']['parts'][0]['text'])
+                except: parsed = {}
+            elif not error: error = "응답 없음"
+        except Exception as e: error = e
+        for name, ctx, collected, cache_key in chunk:
+            js = parsed.get(str(ctx.get('code', '')))
+            if error:
+                results[ctx.get('code', '')] = keyword_news_result(collected[0], collected[1], error)
+            elif js:
+                result = news_result_from_json(js)
+                cache_set(cache_key, result)
+                results[ctx.get('code', '')] = {**result, "raw_news": collected[1]}
+            else: fallback.append((name, ctx, collected))
+
+    if fallback:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            outs = executor.map(lambda item: get_news_sentiment_llm(item[0], stock_data_context=item[1], collected=item[2]), fallback)
+            for (name, ctx, collected), news in zip(fallback, outs): results[ctx.get('code', '')] = news
+    return results
+
+def complete_deferred_news(results):
+    # analyze_pro(..., defer_news=True) 결과들의 AI 분석을 일괄 처리한 뒤 최종 점수 확정
+    news_requests = [r['_news_request'] for r in results if r.get('_news_request')]
+    news_map = get_news_sentiment_batch(news_requests) if news_requests else {}
+    for r in results:
+        if r['code'] in news_map: r['news'] = news_map[r['code']]
+        finalize_analysis(r)
+    return results
 
 def get_supply_demand(code):
     try:
-        e = datetime.datetime.now().strftime("%Y%m%d")
-        s = (datetime.datetime.now()-datetime.timedelta(days=7)).strftime("%Y%m%d")
-        df = stock.get_market_investor_net_purchase_by_date(s, e, code).tail(3)
-        if df.empty: return {"f":0, "i":0}
-        return {"f": int(df['외국인'].sum()), "i": int(df['기관합계'].sum())}
+        f, i = investor_tail_sum(code, n=3, days=7)
+        return {"f": int(f), "i": int(i)}
     except: return {"f":0, "i":0}
 
 def round_to_tick(price):
@@ -731,9 +749,9 @@ def round_to_tick(price):
     elif price < 500000: return int(round(price / 500) * 500)
     else: return int(round(price, -3))
 
-def analyze_pro(code, name_override=None, relation_tag=None, my_buy_price=None):
+def analyze_pro(code, name_override=None, relation_tag=None, my_buy_price=None, history=None, defer_news=False):
     try:
-        score, tags, vol_ratio, chg_rate, win_rate, df, main_reason = calculate_sniper_score(code)
+        score, tags, vol_ratio, chg_rate, win_rate, df, main_reason = calculate_sniper_score(code, history)
         if df.empty: return None
         curr = df.iloc[-1]
     except: return None
@@ -783,20 +801,32 @@ def analyze_pro(code, name_override=None, relation_tag=None, my_buy_price=None):
         tech_score = score 
     except: tech_score = 0
 
-    try: fund_score, _, fund_data = get_company_guide_score(code); result_dict['fund_data'] = fund_data
+    # 서로 독립적인 조회(+뉴스 수집)는 한꺼번에 시작하고, AI 분석은 이 결과가 모두 모인 뒤 실행
+    # (종목 메인 페이지는 펀더멘탈/재무표가 같이 쓰므로 먼저 한 번만 받아 캐시에 올림)
+    fetched = run_task_graph({
+        "page": (lambda: get_item_main_page_or_none(code), []),
+        "fund": (lambda page: get_company_guide_score(code, page), ["page"]),
+        "cycle": (lambda: get_market_cycle_status(code), []),
+        "investor": (lambda: get_investor_trend(code), []),
+        "fin": (annual_from_page, ["page"]),
+        "supply": (lambda: get_supply_demand(code), []),
+        "macro": (get_macro_data, []),
+        "headlines": (lambda: collect_news(result_dict['name'], code), []),
+    })
+    ok = lambda key: not isinstance(fetched[key], Exception)
+
+    try: fund_score, _, fund_data = fetched['fund']; result_dict['fund_data'] = fund_data
     except: fund_score = 0; fund_data = {}
     
-    cycle_txt = get_market_cycle_status(code)
+    cycle_txt = fetched['cycle'] if ok('cycle') else "시장 분석 중"
     result_dict['cycle_txt'] = cycle_txt
     if "상승세" in cycle_txt: tech_score += 10 
 
-    try: result_dict['investor_trend'] = get_investor_trend(code)
-    except: pass
-    try: result_dict['fin_history'] = get_financial_history(code)
-    except: pass
-    try: result_dict['supply'] = get_supply_demand(code)
-    except: pass
+    if ok('investor'): result_dict['investor_trend'] = fetched['investor']
+    if ok('fin'): result_dict['fin_history'] = fetched['fin']
+    if ok('supply'): result_dict['supply'] = fetched['supply']
 
+    temp_score = atr = current_price = None
     try:
         bonus = 0
         if not result_dict['investor_trend'].empty: bonus += 5
@@ -826,7 +856,7 @@ def analyze_pro(code, name_override=None, relation_tag=None, my_buy_price=None):
         elif i_net > 0: supply_txt = "기관 매수 우위"
         elif f_net < 0 and i_net < 0: supply_txt = "외국인/기관 동반 매도"
 
-        macro_data = get_macro_data()
+        macro_data = fetched['macro'] if ok('macro') else None
         usd_change = 0.0
         if macro_data and 'USD/KRW' in macro_data:
             usd_change = macro_data['USD/KRW']['change']
@@ -860,9 +890,28 @@ def analyze_pro(code, name_override=None, relation_tag=None, my_buy_price=None):
             "price_surge": price_surge, 
             "round_figure_msg": round_fig_msg 
         }
-        result_dict['news'] = get_news_sentiment_llm(result_dict['name'], stock_data_context=context)
+        headlines = fetched['headlines'] if ok('headlines') else None
+        if defer_news:
+            # 관심종목 탭처럼 여러 종목을 한 번에 AI 분석할 때는 요청만 남겨두고 나중에 일괄 처리
+            result_dict['_news_request'] = {"name": result_dict['name'], "context": context, "collected": headlines}
+        else:
+            result_dict['news'] = get_news_sentiment_llm(result_dict['name'], stock_data_context=context, collected=headlines)
     except: pass 
 
+    result_dict['_pending'] = {
+        "temp_score": temp_score, "quant_signal": quant_signal, "atr": atr, "current_price": current_price,
+        "curr": curr, "main_reason": main_reason, "my_buy_price": my_buy_price
+    }
+    if defer_news: return result_dict
+    return finalize_analysis(result_dict)
+
+def finalize_analysis(result_dict):
+    # 뉴스/AI 점수를 반영해 최종 점수와 매매 전략을 확정
+    p = result_dict.pop('_pending', None) or {}
+    result_dict.pop('_news_request', None)
+    temp_score, quant_signal, atr, current_price = p.get('temp_score'), p.get('quant_signal'), p.get('atr'), p.get('current_price')
+    curr, main_reason, my_buy_price = p.get('curr'), p.get('main_reason'), p.get('my_buy_price')
+
     try:
         ai_news_score = result_dict['news'].get('score', 0)
         ai_cycle_score = result_dict['news'].get('supply_score', 0) * 2
@@ -919,7 +968,7 @@ def analyze_pro(code, name_override=None, relation_tag=None, my_buy_price=None):
     return result_dict
 
 def send_telegram_msg(token, chat_id, msg):
-    try: requests.post(f"https://api.telegram.org/bot{token}/sendMessage", data={"chat_id": chat_id, "text": msg})
+    try: http_post(f"https://api.telegram.org/bot{token}/sendMessage", data={"chat_id": chat_id, "text": msg})
     except: pass
 
 # --- [3. 메인 화면] ---
@@ -952,6 +1001,12 @@ with st.expander("🌍 글로벌 거시 경제 & 공급망 대시보드 (Click t
                 st.markdown(f"""<div class='metric-box'><div class='metric-title'>{key}</div><div class='metric-value' style='color:{val_color}'>{d['val']:,.2f}</div><div style='font-size:12px; color:{val_color}'>{d['change']:+.2f}%</div><div class='metric-badge' style='{badge_style}'>{badge_text}</div></div>""", unsafe_allow_html=True)
     else: st.warning("거시 경제 데이터를 불러오지 못했습니다.")
 
+# 세 탭(테마/잔고/관심)에 등장하는 종목을 중복 없이 모아 시세를 한 번에 로딩
+panel_codes = [item['code'] for item in st.session_state.get('preview_list', [])]
+panel_codes += [info['code'] for info in st.session_state['data_store']['portfolio'].values()]
+panel_codes += [info['code'] for info in st.session_state['data_store']['watchlist'].values()]
+price_panel = get_price_panel(tuple(sorted(set(str(c) for c in panel_codes))))
+
 # [V49.0] 탭 분리 (Tab Separation)
 tab1, tab2, tab3 = st.tabs(["🔍 테마/종목 발굴", "💰 내 잔고 (Portfolio)", "👀 관심 종목 (Watchlist)"])
 
@@ -966,7 +1021,7 @@ with tab1:
         with st.spinner("🚀 고속 AI 분석 엔진 & 백테스팅 가동 중..."):
             preview_results = []
             with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                futures = [executor.submit(analyze_pro, item['code'], item['name'], item.get('relation_tag')) for item in st.session_state['preview_list']]
+                futures = [executor.submit(analyze_pro, item['code'], item['name'], item.get('relation_tag'), None, panel_history(price_panel, str(item['code']))) for item in st.session_state['preview_list']]
                 for f in concurrent.futures.as_completed(futures):
                     if f.result(): preview_results.append(f.result())
             preview_results.sort(key=lambda x: x['score'], reverse=True)
@@ -986,8 +1041,8 @@ with tab1:
                 with col_add:
                     if st.button(f"📌 관심등록", key=f"add_prev_{res['code']}"):
                         st.session_state['data_store']['watchlist'][res['name']] = {'code': res['code']}
-                        if update_github_file(st.session_state['data_store']):
-                            st.success("저장 완료")
+                        if save_data_store(st.session_state['data_store']):
+                            st.success("관심등록 완료")
                         time.sleep(0.5); st.rerun()
                 col1, col2 = st.columns(2)
                 with col1:
@@ -1002,6 +1057,8 @@ with tab1:
                     st.write("###### 🏢 재무 펀더멘탈")
                     render_fund_scorecard(res['fund_data'])
                     render_financial_table(res['fin_history'])
+                    related_themes = themes_for_code(res['code'])
+                    if related_themes: st.caption("🏷️ 관련 테마: " + ", ".join(related_themes[:8]))
                 st.write("###### 🧠 큰손 투자 동향")
                 render_investor_chart(res['investor_trend'])
                 st.write("###### 📰 AI 헤지펀드 매니저 분석")
@@ -1033,7 +1090,7 @@ with tab2:
                         safe_buy_price = float(info.get('buy_price', 0))
                     except:
                         safe_buy_price = 0.0
-                    futures.append(executor.submit(analyze_pro, info['code'], name, None, safe_buy_price))
+                    futures.append(executor.submit(analyze_pro, info['code'], name, None, safe_buy_price, panel_history(price_panel, str(info['code']))))
 
                 for f in concurrent.futures.as_completed(futures):
                     if f.result(): port_results.append(f.result())
@@ -1046,7 +1103,7 @@ with tab2:
                 with col_btn:
                     if st.button(f"🗑️ 삭제", key=f"del_port_{res['code']}"):
                         del st.session_state['data_store']['portfolio'][res['name']]
-                        update_github_file(st.session_state['data_store'])
+                        save_data_store(st.session_state['data_store'])
                         st.rerun()
                 
                 col1, col2 = st.columns(2)
@@ -1110,9 +1167,10 @@ with tab3:
         with st.spinner("🚀 관심 종목 분석 중..."):
             wl_results = []
             with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                futures = [executor.submit(analyze_pro, info['code'], name) for name, info in watchlist_items]
+                futures = [executor.submit(analyze_pro, info['code'], name, None, None, panel_history(price_panel, str(info['code'])), True) for name, info in watchlist_items]
                 for f in concurrent.futures.as_completed(futures):
                     if f.result(): wl_results.append(f.result())
+            complete_deferred_news(wl_results)
             wl_results.sort(key=lambda x: x['score'], reverse=True)
         
         for res in wl_results:
@@ -1146,7 +1204,7 @@ with tab3:
                             del st.session_state['data_store']['watchlist'][res['name']]
 
                         # 3. Save & Rerun
-                        if update_github_file(st.session_state['data_store']):
+                        if save_data_store(st.session_state['data_store']):
                             st.success(f"✅ {res['name']} 매수 등록 완료! (잔고 탭으로 이동됨)")
                             time.sleep(1.0)
                             st.rerun()
@@ -1155,7 +1213,7 @@ with tab3:
                 with col_btn:
                     if st.button(f"🗑️ 삭제", key=f"del_wl_{res['code']}"):
                         del st.session_state['data_store']['watchlist'][res['name']]
-                        update_github_file(st.session_state['data_store'])
+                        save_data_store(st.session_state['data_store'])
                         st.rerun()
                 
                 col1, col2 = st.columns(2)
@@ -1199,19 +1257,20 @@ with st.sidebar:
             
             if not target_keyword: st.warning("검색어를 입력하세요!")
             else:
-                if krx_df.empty:
-                    with st.spinner("종목 리스트 업데이트..."): krx_df = get_krx_list_safe() 
+                if symbol_index.empty:
+                    with st.spinner("종목 리스트 업데이트..."):
+                        refresh_listing()
+                        symbol_index = get_symbol_index()
 
                 is_stock_found = False; target_code = None
                 
-                if target_keyword.isdigit() and not krx_df.empty:
-                    if target_keyword in krx_df['Code'].values:
+                if target_keyword.isdigit():
+                    if symbol_index.has_code(target_keyword):
                         target_code = target_keyword
-                        try: target_keyword = krx_df[krx_df['Code'] == target_code].iloc[0]['Name']
-                        except: pass
-                elif not krx_df.empty and target_keyword in krx_df['Name'].values:
-                    try: target_code = krx_df[krx_df['Name'] == target_keyword].iloc[0]['Code']
-                    except: pass
+                        target_keyword = symbol_index.name_of(target_code)
+                else:
+                    target_code = symbol_index.code_of(target_keyword)
+                    if target_code: target_keyword = symbol_index.name_of(target_code)
 
                 if target_code:
                     try:
@@ -1243,6 +1302,23 @@ with st.sidebar:
                                 else: st.error(f"❌ '{target_keyword}'에 대한 결과를 찾을 수 없습니다.")
                     except Exception as e: st.error(f"오류: {str(e)}")
 
+        # 종목명 일부만 입력한 경우 (예: "삼성전" → 삼성전자): 테마 검색은 그대로 두고 후보만 보여줌
+        typed = user_input.strip() if selected_preset == "직접 입력" else ""
+        if typed and not typed.isdigit() and not symbol_index.code_of(typed):
+            hits = symbol_index.prefix(typed, limit=10)
+            if hits:
+                labels = {f"{n} ({c})": (n, c) for n, c in hits}
+                picked = st.selectbox("💡 혹시 이 종목을 찾으세요?", ["선택 안 함"] + list(labels), key="symbol_suggest")
+                if picked != "선택 안 함" and st.button("선택한 종목 분석"):
+                    s_name, s_code = labels[picked]
+                    try:
+                        res = analyze_pro(s_code, s_name)
+                        if res:
+                            st.session_state['preview_list'] = [res]
+                            st.session_state['current_theme_name'] = f"개별 종목: {s_name}"
+                            st.rerun()
+                    except Exception as e: st.error(f"오류: {str(e)}")
+
     if st.button("🚀 텔레그램 리포트 전송"):
         token = USER_TELEGRAM_TOKEN
         chat_id = USER_CHAT_ID
@@ -1269,12 +1345,23 @@ with st.sidebar:
             else:
                 st.session_state['data_store']['watchlist'][name] = {"code": code}
                 
-            if update_github_file(st.session_state['data_store']):
+            if save_data_store(st.session_state['data_store'], wait=True):
                 st.success("✅ 저장 완료!")
             else:
                 st.error("❌ 저장 실패")
             time.sleep(0.5); st.rerun()
+
+    # 아직 GitHub 에 커밋되지 않은 수정분 상태 (실패하면 간격을 늘려 가며 자동 재시도)
+    save_state, save_error = store_status(get_data_store())
+    if save_state == "failed": st.error(f"❌ 저장 실패 (자동 재시도 중): {save_error}")
+    elif save_state == "pending": st.caption("⏳ 저장 대기 중...")
             
+    with st.expander("🤖 AI 호출 현황"):
+        m = get_scheduler_metrics()
+        st.caption(f"분당 한도 {m['rpm']:.0f}회 · 대기열 {m['queue_depth']}건 (최대 {m['max_depth']}건)")
+        st.caption(f"호출 {m['requests']}회 · 평균 대기 {m['avg_wait']:.1f}초 (최대 {m['max_wait']:.1f}초)")
+        st.caption(f"429 {m['rate_limited']}회 · 재시도 {m['retries']}회 · 대기 초과 {m['timeouts']}회")
+
     if st.button("초기화"): 
         st.session_state['data_store'] = {"portfolio": {}, "watchlist": {}}
         st.session_state['preview_list'] = []
@@ -1,14 +1,35 @@
 import os
 import datetime
-import requests
 import FinanceDataReader as fdr
-from pykrx import stock
 import pandas as pd
-import json
 import time
+import threading
+import concurrent.futures
+from modules.price_store import load_history
+from modules.stream_indicators import IndicatorState
+from modules.bot_state import BotState
+from modules.paths import data_path
+from modules.net import http_get
+from modules.investor_flow import investor_tail_sum, update_flow_tail, flow_tail_sum
+from modules.storage import open_store, parse_replicas, JSONFileStore
 
 # --- [설정] ---
 DATA_FILE = "my_watchlist_v7.json" # 로봇이 읽어야 할 공용 장부 파일명
+STATE_FILE = data_path("bot_state.json") # 실행 간에 이어 쓰는 상태 (지표 / 수급 꼬리 / 마지막 알림)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json").lower() # json(저장소 파일) / sqlite(앱과 같은 로컬 DB)
+STORAGE_REPLICAS = parse_replicas(os.environ.get("STORAGE_REPLICAS", ""))
+
+# --- [장중 스캔 설정] ---
+# 종목들을 BOT_WORKERS 개 스레드로 동시에 채점하되, 같은 곳(호스트)에는 HOST_LIMITS 개까지만 동시에 요청합니다.
+# 30분 간격 실행이 겹치지 않도록 BOT_TIME_BUDGET_SEC 가 지나면 새 종목은 시작하지 않고,
+# 그때까지의 결과 + 확인하지 못한 종목 목록을 보냅니다.
+BOT_WORKERS = int(os.environ.get("BOT_WORKERS", "8"))
+BOT_TIME_BUDGET_SEC = float(os.environ.get("BOT_TIME_BUDGET_SEC", str(20 * 60)))
+HOST_LIMITS = {
+    "krx": int(os.environ.get("BOT_KRX_CONCURRENCY", "2")),      # pykrx 투자자별 매매 (data.krx.co.kr)
+    "price": int(os.environ.get("BOT_PRICE_CONCURRENCY", "4")),  # fdr.DataReader 일봉
+}
+_host_slots = {host: threading.BoundedSemaphore(max(n, 1)) for host, n in HOST_LIMITS.items()}
 
 # --- [GitHub Secrets: 텔레그램 설정 가져오기] ---
 TOKEN = os.environ.get("TELEGRAM_TOKEN")
@@ -20,24 +41,26 @@ def send_msg(msg):
         return
     url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
     try:
-        requests.get(url, params={"chat_id": CHAT_ID, "text": msg})
+        http_get(url, params={"chat_id": CHAT_ID, "text": msg})
     except Exception as e:
         print(f"전송 실패: {e}")
 
-# --- [핵심: JSON 파일에서 종목 불러오기] ---
+# --- [핵심: 저장소에서 종목 불러오기 (modules/storage.py)] ---
 def load_watchlist():
-    # 1. 같은 폴더에 파일이 있는지 확인
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # 데이터 변환: {"삼성전자": "005930", ...} 형태로 만듦
-                watchlist = {name: info["code"] for name, info in data.items()}
-                return watchlist
-        except Exception as e:
-            print(f"파일 읽기 에러: {e}")
+    # 1. 설정된 저장소(기본: 같은 폴더의 JSON 파일)에서 보유 + 관심 종목 읽기
+    try:
+        store = open_store(STORAGE_BACKEND, STORAGE_REPLICAS, {"json": lambda: JSONFileStore(DATA_FILE)})
+        data = store.load()
+        # 데이터 변환: {"삼성전자": "005930", ...} 형태로 만듦
+        watchlist = {}
+        for category in ("portfolio", "watchlist"):
+            for name, info in (data.get(category) or {}).items():
+                if isinstance(info, dict) and info.get("code"): watchlist[name] = str(info["code"]).zfill(6)
+        if watchlist: return watchlist
+    except Exception as e:
+        print(f"저장소 읽기 에러: {e}")
             
-    # 2. 파일이 없거나 에러나면 비상용 기본값 사용
+    # 2. 비어 있거나 에러나면 비상용 기본값 사용
     print("기본 종목 리스트를 사용합니다.")
     return {
         "삼성전자": "005930",
@@ -45,19 +68,17 @@ def load_watchlist():
     }
 
 # --- [분석 로직] ---
-def get_stock_score(code):
+def get_stock_score(code, states=None, flows=None):
     try:
-        # 1. 수급 분석 (최근 1주일)
-        today = datetime.datetime.now().strftime("%Y%m%d")
-        start = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime("%Y%m%d")
-        
+        # 1. 수급 분석 (최근 1주일 중 마지막 3거래일)
+        #    flows 가 있으면 지난 실행의 수급 꼬리에 마지막 저장일 이후만 받아 붙임 (실패하면 지난 값 사용)
         try:
-            df_sup = stock.get_market_investor_net_purchase_by_date(start, today, code)
-            if not df_sup.empty:
-                last3 = df_sup.tail(3)
-                f = last3['외국인'].sum()
-                i = last3['기관합계'].sum()
-            else: f, i = 0, 0
+            with _host_slots["krx"]:
+                if flows is None: f, i = investor_tail_sum(code, n=3, days=7)
+                else:
+                    try: flows[code] = update_flow_tail(code, flows.get(code), days=7)
+                    except Exception as e: print(f"수급 갱신 에러 ({code}): {e}")
+                    f, i = flow_tail_sum(flows.get(code), n=3)
         except: f, i = 0, 0
 
         pass_cnt = 0
@@ -65,35 +86,55 @@ def get_stock_score(code):
 
         if f > 0 or i > 0: pass_cnt += 1; checks.append("수급 유입(외/기)")
         
-        # 2. 기술적 분석 (120일치 데이터)
-        df = fdr.DataReader(code, datetime.datetime.now() - datetime.timedelta(days=120))
+        # 2. 기술적 분석: 저장된 지표 상태에 새 봉만 반영 (처음 보는 종목은 120일치로 초기화)
+        if states is None: states = {}
+        with _host_slots["price"]: df = load_history(code, days=120)
         if df.empty: return 0, 0, []
+        state = states.setdefault(code, IndicatorState())
+        ind = state.sync(df)
+        if ind is None: return 0, 0, []
         
-        curr = df.iloc[-1]
-        ma20 = df['Close'].rolling(20).mean().iloc[-1]
-        std = df['Close'].rolling(20).std().iloc[-1]
-        upper = ma20 + (std * 2)
-        lower = ma20 - (std * 2)
-        
-        # RSI 계산
-        delta = df['Close'].diff(1)
-        up = delta.where(delta > 0, 0)
-        down = -delta.where(delta < 0, 0)
-        rsi = 100 - (100 / (1 + (up.rolling(14).mean().iloc[-1] / down.rolling(14).mean().iloc[-1])))
+        close, ma20, upper, lower, rsi = ind['close'], ind['ma20'], ind['upper'], ind['lower'], ind['rsi']
         
         # 채점 로직
-        if curr['Close'] >= ma20: pass_cnt += 1; checks.append("20일선 위")
-        if curr['Close'] <= lower * 1.02: pass_cnt += 1; checks.append("볼린저 하단(기회)")
-        elif curr['Close'] >= upper * 0.98: pass_cnt -= 0.5; checks.append("볼린저 상단(과열)")
+        if close >= ma20: pass_cnt += 1; checks.append("20일선 위")
+        if close <= lower * 1.02: pass_cnt += 1; checks.append("볼린저 하단(기회)")
+        elif close >= upper * 0.98: pass_cnt -= 0.5; checks.append("볼린저 상단(과열)")
         
         if rsi <= 70: pass_cnt += 1; checks.append("RSI 안정")
         else: checks.append("RSI 과열")
         
         score = min(pass_cnt * 25, 100)
-        return score, curr['Close'], checks
+        return score, close, checks
     except:
         return 0, 0, []
 
+def scan_watchlist(watchlist, state, workers=BOT_WORKERS, budget=BOT_TIME_BUDGET_SEC):
+    # ({종목명: (점수, 현재가, 이유)}, 시간 안에 확인하지 못한 종목명 목록)
+    # 각 작업은 상태(BotState) 사본으로 계산하고, 끝난 종목만 state 에 반영 (시간 초과 시 계산 중인 상태를 저장하지 않음)
+    deadline = time.time() + budget
+    states, flows = state.indicators, state.flows
+    def task(name, code):
+        if time.time() > deadline: return None
+        local = {code: IndicatorState.from_dict(states[code].to_dict())} if code in states else {}
+        local_flows = {code: flows[code]} if code in flows else {}
+        return get_stock_score(code, local, local_flows), local.get(code), local_flows.get(code)
+
+    results = {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1))
+    futures = {executor.submit(task, name, code): (name, code) for name, code in watchlist.items()}
+    concurrent.futures.wait(futures, timeout=max(deadline - time.time(), 0))
+    for fut, (name, code) in futures.items():
+        if not fut.done() or fut.cancelled() or fut.exception() is not None: continue
+        res = fut.result()
+        if res is None: continue
+        results[name] = res[0]
+        if res[1] is not None: states[code] = res[1]
+        if res[2] is not None: flows[code] = res[2]
+    executor.shutdown(wait=False, cancel_futures=True)
+    unreached = [name for name in watchlist if name not in results]
+    return results, unreached
+
 def get_market_summary():
     try:
         # S&P500 등락률 체크
@@ -126,15 +167,33 @@ if __name__ == "__main__":
     # 2. 장중 (09:00 ~ 15:30): 30분 간격 감시
     elif 9 <= hour < 16:
         alerts = []
+        state = BotState.load(STATE_FILE)
+        state.prune(MY_WATCHLIST.values())
+        results, unreached = scan_watchlist(MY_WATCHLIST, state)
+        print(f"Scanned: {len(results)}/{len(MY_WATCHLIST)} items")
+        repeated = 0
         for name, code in MY_WATCHLIST.items():
-            score, price, reasons = get_stock_score(code)
+            if name not in results: continue
+            score, price, reasons = results[name]
+            if not price: continue  # 데이터를 못 받은 종목은 알림 상태를 바꾸지 않음
             
-            # 알림 조건: 75점 이상(매수) 또는 25점 이하(매도/위험)
-            if score >= 75:
+            # 알림 조건: 75점 이상(매수) 또는 25점 이하(매도/위험). 지난 실행과 같은 알림이면 다시 보내지 않음
+            kind = "buy" if score >= 75 else "risk" if score <= 25 else None
+            if not state.alert_changed(code, kind, score):
+                if kind: repeated += 1
+                continue
+            if kind == "buy":
                 alerts.append(f"🚀 [매수 포착] {name} ({score}점)\n현재가: {price:,.0f}원\n이유: {', '.join(reasons)}")
-            elif score <= 25:
+            else:
                 alerts.append(f"📉 [위험 경고] {name} ({score}점)\n현재가: {price:,.0f}원\n이유: {', '.join(reasons)}")
+        state.save()
+        if repeated: print(f"이미 보낸 알림 {repeated}건은 생략")
         
+        # 시간 안에 다 못 본 경우 표시 (일부 결과라도 보냄)
+        if unreached:
+            shown = ', '.join(unreached[:20]) + ('...' if len(unreached) > 20 else '')
+            alerts.append(f"⏱️ [시간 초과] {len(unreached)}개 종목은 이번 회차에 확인하지 못했습니다.\n{shown}")
+
         # 알림이 있을 때만 보냄 (알림 공해 방지)
         if alerts:
             final_msg = f"🔔 [장중 밀착 감시] 특이종목 발견!\n\n" + "\n\n".join(alerts)
@@ -1,48 +1,43 @@
 import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from modules.sheets import get_book
 
 # ---------------------------------------------------------
 # 1. 구글 시트 연결 (인증) - 에러 메시지 강화
 # ---------------------------------------------------------
-def get_db_connection():
+def get_book_connection():
+    # 인증/시트 열기는 프로세스에서 한 번만 (modules/sheets.py 에서 재사용 + 백그라운드 재인증)
     try:
         # Streamlit Secrets에서 [gcp_service_account] 가져오기
         # st.secrets는 딕셔너리처럼 동작하지만, 안전하게 dict()로 변환
         credentials_dict = dict(st.secrets["gcp_service_account"])
         
-        # 봇 인증 범위 설정
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        
-        # JSON 키 내용으로 인증 객체 생성
-        credentials = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, scope)
-        
-        # gspread 인증 실행
-        gc = gspread.authorize(credentials)
-        
         # 스프레드시트 열기 (이름 정확해야 함: QuantSniper_DB)
-        sh = gc.open("QuantSniper_DB") 
-        return sh
+        book = get_book("data_loader", credentials_dict, lambda gc: gc.open("QuantSniper_DB"))
+        book.doc()
+        return book
 
     except Exception as e:
         # 🚨 여기가 중요합니다! 에러가 나면 화면에 빨간 박스로 보여줍니다.
         st.error(f"⚠️ 구글 시트 연결 오류 발생:\n{str(e)}")
         return None
 
+def get_db_connection():
+    book = get_book_connection()
+    return book.doc() if book else None
+
 # ---------------------------------------------------------
 # 2. 데이터 불러오기 (Read)
 # ---------------------------------------------------------
 def load_data():
-    sh = get_db_connection()
+    book = get_book_connection()
     # 연결 실패 시 빈 딕셔너리 반환 (앱이 멈추지 않도록)
-    if not sh: return {"portfolio": {}, "watchlist": {}}
+    if not book: return {"portfolio": {}, "watchlist": {}}
 
     data_store = {"portfolio": {}, "watchlist": {}}
 
     # (1) Portfolio 시트 읽기
     try:
-        ws_port = sh.worksheet("Portfolio")
-        records = ws_port.get_all_records() 
+        records = book.records("Portfolio")
         
         for row in records:
             if row.get('Name'):
@@ -63,8 +58,7 @@ def load_data():
 
     # (2) Watchlist 시트 읽기
     try:
-        ws_watch = sh.worksheet("Watchlist")
-        records = ws_watch.get_all_records()
+        records = book.records("Watchlist")
         
         for row in records:
             if row.get('Name'):
@@ -84,31 +78,34 @@ def load_data():
 # 3. 데이터 추가하기 (Create/Update)
 # ---------------------------------------------------------
 def add_stock_to_db(category, name, code, buy_price=0):
-    sh = get_db_connection()
-    if not sh: return False
+    book = get_book_connection()
+    if not book: return False
 
     try:
         str_code = f"'{code}" # 엑셀에서 숫자가 짤리지 않게 ' 붙임
+        title = "Portfolio" if category == "portfolio" else "Watchlist"
+        # 이미 있는 종목인지 로컬 이름→행 표로 확인 (서버 find 호출 없음)
+        values = [list(r) for r in book.values(title)]
+        row = book.find_row(title, name)
         
         if category == "portfolio":
-            ws = sh.worksheet("Portfolio")
-            try:
-                # 이미 있는 종목인지 확인
-                cell = ws.find(name)
+            if row is not None:
                 # 있다면 가격 수정 (3번째 열)
-                ws.update_cell(cell.row, 3, buy_price) 
-            except:
+                book.batch_update([book.update_request(title, row, [buy_price], col=2)])
+                values[row] = values[row] + [""] * (3 - len(values[row]))
+                values[row][2] = str(buy_price)
+            else:
                 # 없다면 새로 추가
-                ws.append_row([name, str_code, buy_price])
+                book.batch_update([book.append_request(title, [[name, str_code, buy_price]])])
+                values.append([name, str_code, str(buy_price)])
                 
         else: # watchlist
-            ws = sh.worksheet("Watchlist")
-            try:
-                cell = ws.find(name)
-                # 이미 있으면 통과
-            except:
-                ws.append_row([name, str_code])
-                
+            if row is None:
+                book.batch_update([book.append_request(title, [[name, str_code]])])
+                values.append([name, str_code])
+            # 이미 있으면 통과
+        
+        book.set_values(title, values)
         return True
 
     except Exception as e:
@@ -120,20 +117,20 @@ def add_stock_to_db(category, name, code, buy_price=0):
 # 4. 데이터 삭제하기 (Delete)
 # ---------------------------------------------------------
 def delete_stock_from_db(category, name):
-    sh = get_db_connection()
-    if not sh: return False
+    book = get_book_connection()
+    if not book: return False
 
     try:
         sheet_name = "Portfolio" if category == "portfolio" else "Watchlist"
-        ws = sh.worksheet(sheet_name)
+        row = book.find_row(sheet_name, name)
+        # 시트에 없으면 이미 삭제된 것으로 간주
+        if row is None: return True
         
-        try:
-            cell = ws.find(name)
-            ws.delete_rows(cell.row)
-            return True
-        except:
-            # 시트에 없으면 이미 삭제된 것으로 간주
-            return True
+        values = [list(r) for r in book.values(sheet_name)]
+        book.batch_update([book.delete_request(sheet_name, row)])
+        del values[row]
+        book.set_values(sheet_name, values)
+        return True
             
     except Exception as e:
         st.error(f"❌ 데이터 삭제 실패:\n{str(e)}")
@@ -0,0 +1,61 @@
+import os
+import json
+import time
+from modules.stream_indicators import IndicatorState
+
+# ------------------------------------------------------------------------------
+# daily_bot 실행 간 상태 파일 (.quant_cache/bot_state.json, GitHub Actions 캐시로 복원/저장)
+# - indicators : 종목별 스트리밍 지표 상태 (마지막 확정 봉까지 누적, 새 봉만 반영)
+# - flows      : 종목별 최근 수급 꼬리 (마지막 저장일 이후만 새로 받음)
+# - alerts     : 종목별 마지막으로 보낸 알림 종류/점수 (종류가 바뀔 때만 다시 보냄)
+# 일봉 자체는 modules/price_store.py 의 SQLite 에 같은 캐시 폴더로 남습니다.
+# ------------------------------------------------------------------------------
+STATE_VERSION = 1
+
+class BotState:
+    def __init__(self, path):
+        self.path = path
+        self.indicators = {}  # {종목코드: IndicatorState}
+        self.flows = {}       # {종목코드: {"rows": [...], "synced_at": 시각}}
+        self.alerts = {}      # {종목코드: {"kind": "buy"/"risk", "score": 점수, "at": 시각}}
+
+    @classmethod
+    def load(cls, path):
+        st = cls(path)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f: d = json.load(f)
+                if d.get("version") == STATE_VERSION:
+                    st.indicators = {code: IndicatorState.from_dict(v) for code, v in (d.get("indicators") or {}).items()}
+                    st.flows = d.get("flows") or {}
+                    st.alerts = d.get("alerts") or {}
+            except Exception as e:
+                print(f"봇 상태 파일 읽기 에러: {e}")
+        return st
+
+    def save(self):
+        try:
+            d = {
+                "version": STATE_VERSION, "saved_at": time.time(),
+                "indicators": {code: s.to_dict() for code, s in self.indicators.items()},
+                "flows": self.flows, "alerts": self.alerts,
+            }
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f: json.dump(d, f, ensure_ascii=False)
+            os.replace(self.path + ".tmp", self.path)
+        except Exception as e:
+            print(f"봇 상태 파일 저장 에러: {e}")
+
+    def alert_changed(self, code, kind, score):
+        # kind: "buy" / "risk" / None(특이사항 없음). 지난번과 종류가 다를 때만 True
+        last = self.alerts.get(code)
+        if kind is None:
+            self.alerts.pop(code, None)
+            return False
+        self.alerts[code] = {"kind": kind, "score": score, "at": time.time()}
+        return last is None or last.get("kind") != kind
+
+    def prune(self, codes):
+        # 감시 목록에서 빠진 종목 상태는 버림
+        codes = set(codes)
+        for table in (self.indicators, self.flows, self.alerts):
+            for code in [c for c in table if c not in codes]: del table[code]
@@ -0,0 +1,48 @@
+import time
+import threading
+from collections import OrderedDict
+
+# ------------------------------------------------------------------------------
+# 프로세스 메모리 TTL 캐시 (Streamlit 없이도 쓰는 모듈용)
+# - 같은 키를 여러 스레드가 동시에 요청하면 계산은 한 번만 하고 나머지는 결과를 기다립니다.
+# - maxsize 를 넘으면 가장 오래 안 쓴 항목부터 버립니다.
+# - 계산 중 예외가 나면 캐시에 넣지 않고 그대로 올려보냅니다.
+# ------------------------------------------------------------------------------
+class TTLCache:
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (만료시각, 값)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.time(): return default
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize: self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock: self._data.pop(key, None)
+
+    def get_or_compute(self, key, fn):
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing: return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key, missing)
+            if value is missing:
+                value = fn()
+                self.set(key, value)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
@@ -1,11 +1,11 @@
 import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from modules.sheets import get_book
 
 # ------------------------------------------------------------------------------
 # 1. 구글 시트 연결 함수 (비밀번호 박스에서 열쇠 꺼내서 문 열기)
+#    인증된 클라이언트/워크시트는 프로세스에서 한 번만 만들어 재사용 (modules/sheets.py)
 # ------------------------------------------------------------------------------
-def get_connection():
+def get_book_connection():
     try:
         # Streamlit Secrets에서 저장해둔 구글 시트 정보 가져오기
         conf = st.secrets["google_sheets"]
@@ -25,34 +25,31 @@ def get_connection():
             "client_x509_cert_url": conf["client_x509_cert_url"]
         }
         
-        # 구글 드라이브와 스프레드시트 권한 설정
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        
-        # 인증 및 로그인
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
-        
-        # 시트 주소로 파일 열기
+        # 인증 및 시트 주소로 파일 열기 (이미 열려 있으면 그대로 재사용)
         sheet_url = conf["sheet_url"]
-        doc = client.open_by_url(sheet_url)
-        return doc
+        book = get_book(sheet_url, creds_dict, lambda client: client.open_by_url(sheet_url))
+        book.doc()
+        return book
         
     except Exception as e:
         st.error(f"❌ 구글 시트 연결 실패: {str(e)}")
         return None
 
+def get_connection():
+    book = get_book_connection()
+    return book.doc() if book else None
+
 # ------------------------------------------------------------------------------
 # 2. 데이터 불러오기 (Load): 구글 시트 -> 앱으로 가져오기
 # ------------------------------------------------------------------------------
 def load_db():
-    doc = get_connection()
+    book = get_book_connection()
     # 연결 실패 시 빈 깡통 반환 (에러 방지)
-    if not doc: return {"portfolio": {}, "watchlist": {}}
+    if not book: return {"portfolio": {}, "watchlist": {}}
     
     try:
         # --- [1] 포트폴리오(내 잔고) 읽기 ---
-        ws_port = doc.worksheet("portfolio")
-        port_rows = ws_port.get_all_records() # 엑셀 내용을 리스트로 가져옴
+        port_rows = book.records("portfolio") # 엑셀 내용을 리스트로 가져옴
         
         portfolio_dict = {}
         for row in port_rows:
@@ -64,8 +61,7 @@ def load_db():
                 }
         
         # --- [2] 관심종목 읽기 ---
-        ws_watch = doc.worksheet("watchlist")
-        watch_rows = ws_watch.get_all_records()
+        watch_rows = book.records("watchlist")
         
         watchlist_dict = {}
         for row in watch_rows:
@@ -84,17 +80,18 @@ def load_db():
 
 # ------------------------------------------------------------------------------
 # 3. 데이터 저장하기 (Save): 앱 -> 구글 시트로 쓰기
+#    시트를 지우고 다시 쓰지 않고, 마지막으로 읽은 시트 내용과 비교해서
+#    바뀐 줄만 수정/삭제/추가하는 요청을 두 시트 합쳐 batch_update 한 번으로 보냅니다.
 # ------------------------------------------------------------------------------
+PORT_HEADER = ["Name", "Code", "BuyPrice"]
+WATCH_HEADER = ["Name", "Code"]
+
 def save_db(data):
-    doc = get_connection()
-    if not doc: return False
+    book = get_book_connection()
+    if not book: return False
     
     try:
-        # --- [1] 포트폴리오 저장 ---
-        ws_port = doc.worksheet("portfolio")
-        ws_port.clear() # 기존 내용 싹 지우기 (덮어쓰기 위해)
-        ws_port.append_row(["Name", "Code", "BuyPrice"]) # 첫 줄(제목) 다시 쓰기
-        
+        # --- [1] 포트폴리오 ---
         # 데이터 한 줄씩 만들기
         port_rows = []
         for name, info in data.get('portfolio', {}).items():
@@ -104,14 +101,9 @@ def save_db(data):
                 info.get('buy_price', 0)
             ])
         
-        # 한꺼번에 입력 (속도 향상)
-        if port_rows: ws_port.append_rows(port_rows)
-        
-        # --- [2] 관심종목 저장 ---
-        ws_watch = doc.worksheet("watchlist")
-        ws_watch.clear()
-        ws_watch.append_row(["Name", "Code"]) # 첫 줄(제목)
+        port_reqs, port_values = book.diff_requests("portfolio", PORT_HEADER, port_rows)
         
+        # --- [2] 관심종목 ---
         watch_rows = []
         for name, info in data.get('watchlist', {}).items():
             watch_rows.append([
@@ -119,7 +111,13 @@ def save_db(data):
                 str(info.get('code'))
             ])
             
-        if watch_rows: ws_watch.append_rows(watch_rows)
+        watch_reqs, watch_values = book.diff_requests("watchlist", WATCH_HEADER, watch_rows)
+        
+        # 바뀐 것이 있을 때만 한꺼번에 전송 (요청 1번)
+        if port_reqs or watch_reqs:
+            book.batch_update(port_reqs + watch_reqs)
+            book.set_values("portfolio", port_values)
+            book.set_values("watchlist", watch_values)
             
         return True # 저장 성공!
         
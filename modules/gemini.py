@@ -0,0 +1,95 @@
+import time
+import threading
+from modules.net import http_get, http_post
+from modules.cache import TTLCache
+from modules.llm_scheduler import scheduler, PRIORITY_HOLDING, PRIORITY_NORMAL
+
+# ------------------------------------------------------------------------------
+# Gemini REST 호출
+# - 사용할 모델 이름은 API 키별로 MODEL_TTL 동안 캐시 (매 프롬프트마다 models 목록 조회 X)
+# - generateContent 가 모델 오류(404 등)로 실패하면 백그라운드에서 모델을 다시 고릅니다.
+# - 모든 호출은 llm_scheduler 의 분당 예산을 거치고, 429/503 은 지수 백오프 후 재시도합니다.
+# ------------------------------------------------------------------------------
+API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+FALLBACK_MODEL = "models/gemini-pro"
+MODEL_TTL = 6 * 3600
+FALLBACK_TTL = 60  # 목록 조회 실패로 기본 모델을 쓸 때는 금방 다시 시도
+PREFERENCES = ['models/gemini-1.5-flash', 'models/gemini-1.5-pro', 'models/gemini-pro']
+
+_model_cache = TTLCache(ttl=MODEL_TTL, maxsize=16)
+_refreshing = set()
+_refresh_lock = threading.Lock()
+_resolve_lock = threading.Lock()
+
+def _list_model_name(api_key):
+    # (모델 이름, 목록 조회 성공 여부)
+    try:
+        response = http_get(f"{API_BASE}/models?key={api_key}", timeout=10)
+        if response.status_code == 200:
+            models = response.json().get('models', [])
+            chat_models = [m['name'] for m in models if 'generateContent' in m.get('supportedGenerationMethods', [])]
+            for pref in PREFERENCES:
+                if pref in chat_models: return pref, True
+            if chat_models: return chat_models[0], True
+    except: pass
+    return FALLBACK_MODEL, False
+
+def _resolve(api_key):
+    name, ok = _list_model_name(api_key)
+    _model_cache.set(api_key, name, ttl=MODEL_TTL if ok else FALLBACK_TTL)
+    return name
+
+def get_valid_model_name(api_key):
+    name = _model_cache.get(api_key)
+    if name: return name
+    with _resolve_lock:
+        # 동시에 들어온 호출은 첫 번째 조회 결과를 같이 씁니다
+        return _model_cache.get(api_key) or _resolve(api_key)
+
+def _refresh_in_background(api_key):
+    with _refresh_lock:
+        if api_key in _refreshing: return
+        _refreshing.add(api_key)
+    def run():
+        try: _resolve(api_key)
+        finally:
+            with _refresh_lock: _refreshing.discard(api_key)
+    threading.Thread(target=run, daemon=True).start()
+
+def _is_model_error(res):
+    if res.status_code == 404: return True
+    return res.status_code == 400 and "model" in res.text.lower()
+
+def _retry_after(res):
+    try: return float(res.headers.get("Retry-After"))
+    except: return None
+
+def configure_scheduler(rpm):
+    scheduler.configure(rpm)
+
+def get_scheduler_metrics():
+    return scheduler.metrics()
+
+def generate_content(api_key, prompt, temperature=0.0, timeout=30, priority=PRIORITY_NORMAL):
+    model_name = get_valid_model_name(api_key)
+    clean_model_name = model_name.replace("models/", "")
+    url = f"{API_BASE}/models/{clean_model_name}:generateContent?key={api_key}"
+    headers = {"Content-Type": "application/json"}
+    payload = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {"temperature": temperature}
+    }
+    for attempt in range(scheduler.max_retries + 1):
+        if not scheduler.acquire(priority): return None, "Rate Limit (queue timeout)"
+        try:
+            res = http_post(url, headers=headers, json=payload, timeout=timeout)
+            if res.status_code == 200: return res.json(), None
+            if res.status_code in (429, 503):
+                if attempt == scheduler.max_retries: return None, "Rate Limit"
+                time.sleep(scheduler.backoff(attempt, _retry_after(res)))
+                scheduler.record_retry()
+                continue
+            if _is_model_error(res): _refresh_in_background(api_key)
+            return None, f"HTTP {res.status_code}: {res.text}"
+        except Exception as e: return None, f"Connection Error: {str(e)}"
+    return None, "Rate Limit"
@@ -0,0 +1,229 @@
+import os
+import copy
+import json
+import time
+import base64
+import atexit
+import threading
+from modules.net import http_get, http_put
+
+# ------------------------------------------------------------------------------
+# GitHub Contents API 저장소 (my_watchlist_v7.json)
+# - 마지막으로 본 SHA/ETag 를 기억해서, 저장할 때 매번 GET 으로 SHA 를 다시 받지 않습니다.
+# - save() 는 바로 PUT 하지 않고 DEBOUNCE_SEC 동안 모았다가 한 번에 커밋합니다. (연속 클릭 = 커밋 1번)
+# - 여러 세션의 수정은 "기준본 대비 바뀐 종목"만 3-way 병합해서 서로 덮어쓰지 않습니다.
+# - 409/422(SHA 충돌)이면 원격 최신본을 받아 다시 병합 후 재시도합니다.
+# - 그 밖의 실패는 수정분을 버리지 않고 RETRY_BASE_SEC 부터 두 배씩 늘려 가며 다시 커밋합니다.
+#   아직 커밋 안 된 수정분은 디스크 사본에도 남겨서 프로세스가 재시작돼도 이어서 커밋합니다.
+#   status() 로 저장됨/대기 중/실패 상태를, save(wait=True) 로 커밋 결과를 바로 알 수 있습니다.
+# - load() 는 메모리 사본(모든 세션 공유)을 바로 돌려주고, REVALIDATE_SEC 가 지났으면
+#   If-None-Match 로 백그라운드 재검증합니다. 304 면 본문을 다시 받지 않습니다.
+# - 사본은 디스크(mirror_path)에도 남겨서, 프로세스 재시작 직후 첫 확인도 304 로 끝나게 합니다.
+# ------------------------------------------------------------------------------
+API_BASE = "https://api.github.com"
+DEBOUNCE_SEC = 1.5
+MAX_DELAY_SEC = 10   # 계속 수정이 들어와도 첫 수정 후 이 시간 안에는 커밋
+MAX_RETRIES = 3
+REVALIDATE_SEC = 30
+RETRY_BASE_SEC = 5
+RETRY_MAX_SEC = 300
+EMPTY = {"portfolio": {}, "watchlist": {}}
+
+def normalize(data):
+    if not isinstance(data, dict): return copy.deepcopy(EMPTY)
+    if "portfolio" not in data and "watchlist" not in data:
+        return {"portfolio": {}, "watchlist": data}
+    return data
+
+def merge3(base, mine, theirs):
+    # base 에서 mine 으로 바뀐 항목만 theirs 위에 덮어씀 (섹션 → 종목 단위)
+    base, mine, theirs = base or {}, mine or {}, theirs or {}
+    out = copy.deepcopy(theirs)
+    for section in list(mine) + [s for s in base if s not in mine]:
+        b, m = base.get(section), mine.get(section)
+        if m == b: continue
+        if not isinstance(m, dict) or not isinstance(b, dict) or not isinstance(out.get(section), dict):
+            if m is None: out.pop(section, None)
+            else: out[section] = copy.deepcopy(m)
+            continue
+        target = out[section]
+        for key in list(m) + [k for k in b if k not in m]:
+            if m.get(key) == b.get(key): continue
+            if key in m: target[key] = copy.deepcopy(m[key])
+            else: target.pop(key, None)
+    return out
+
+class GitHubStore:
+    def __init__(self, token, owner, repo, path, message="Update data via Streamlit App", mirror_path=None):
+        self.url = f"{API_BASE}/repos/{owner}/{repo}/contents/{path}"
+        self.headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json"}
+        self.message = message
+        self.mirror_path = mirror_path
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._sha = None
+        self._etag = None
+        self._remote = None     # 마지막으로 확인한 원격 내용
+        self._pending = None    # 아직 커밋 안 된, 원하는 최종 내용
+        self._first_pending = 0.0
+        self._timer = None
+        self._checked_at = 0.0  # 마지막으로 원격과 맞춰 본 시각 (0 이면 이 프로세스에서 아직 확인 안 함)
+        self._revalidating = False
+        self._failures = 0      # 연속 커밋 실패 횟수 (재시도 간격 계산)
+        self.stats = {"saves": 0, "commits": 0, "conflicts": 0, "errors": 0, "last_error": "", "fetches": 0, "not_modified": 0}
+        atexit.register(self.flush)
+
+    def _fetch(self, conditional=False):
+        # 원격 최신본 (내용, 성공 여부). conditional 이면 ETag 로 재검증해서 304 는 메모리 사본 사용
+        headers = dict(self.headers)
+        with self._lock:
+            if conditional and self._etag and self._remote is not None: headers["If-None-Match"] = self._etag
+        r = http_get(self.url, headers=headers)
+        if r.status_code == 304:
+            with self._lock:
+                self._checked_at = time.time()
+                self.stats["not_modified"] += 1
+                return copy.deepcopy(self._remote), True
+        if r.status_code == 200:
+            js = r.json()
+            data = normalize(json.loads(base64.b64decode(js['content']).decode('utf-8')))
+            with self._lock:
+                self._sha, self._etag, self._remote = js.get('sha'), r.headers.get('ETag'), data
+                self._checked_at = time.time()
+                self.stats["fetches"] += 1
+            self._save_mirror()
+            return data, True
+        if r.status_code == 404:
+            with self._lock:
+                self._sha, self._etag, self._remote = None, None, copy.deepcopy(EMPTY)
+                self._checked_at = time.time()
+            return copy.deepcopy(EMPTY), True
+        return None, False
+
+    def _load_mirror(self):
+        if not self.mirror_path or not os.path.exists(self.mirror_path): return
+        try:
+            with open(self.mirror_path, "r", encoding="utf-8") as f: m = json.load(f)
+            with self._lock:
+                if self._remote is None:
+                    self._sha, self._etag, self._remote = m.get("sha"), m.get("etag"), normalize(m.get("data"))
+                if m.get("pending") is not None and self._pending is None:
+                    # 지난 프로세스에서 커밋하지 못한 수정분
+                    self._pending, self._first_pending = normalize(m["pending"]), time.time()
+                    self._schedule()
+        except Exception as e:
+            print(f"GitHub 사본 읽기 에러: {e}")
+
+    def _save_mirror(self):
+        if not self.mirror_path: return
+        try:
+            with self._lock: m = {"sha": self._sha, "etag": self._etag, "data": self._remote, "pending": self._pending}
+            with open(self.mirror_path + ".tmp", "w", encoding="utf-8") as f: json.dump(m, f, ensure_ascii=False)
+            os.replace(self.mirror_path + ".tmp", self.mirror_path)
+        except Exception as e:
+            print(f"GitHub 사본 저장 에러: {e}")
+
+    def _revalidate_in_background(self):
+        with self._lock:
+            if self._revalidating: return
+            self._revalidating = True
+        def run():
+            try: self._fetch(conditional=True)
+            except Exception as e: print(f"GitHub Load Error: {e}")
+            finally:
+                with self._lock: self._revalidating = False
+        threading.Thread(target=run, daemon=True).start()
+
+    def load(self):
+        # 아직 커밋 전인 수정이 있으면 그것까지 반영된 내용
+        if self._remote is None: self._load_mirror()
+        if not self._checked_at:
+            # 이 프로세스의 첫 확인만 기다림 (디스크 사본이 있으면 대개 304)
+            try: self._fetch(conditional=True)
+            except Exception as e: print(f"GitHub Load Error: {e}")
+        elif time.time() - self._checked_at > REVALIDATE_SEC:
+            self._revalidate_in_background()
+        with self._lock:
+            if self._pending is not None: return copy.deepcopy(self._pending)
+            return copy.deepcopy(self._remote) if self._remote is not None else copy.deepcopy(EMPTY)
+
+    def save(self, new_data, base=None, wait=False):
+        # base: 이 세션이 수정을 시작한 기준본. 없으면 마지막 원격본 기준
+        # wait 이면 바로 커밋하고 그 결과를, 아니면 직전 커밋이 실패 중인지 여부를 돌려줌
+        if self._remote is None: self._load_mirror()
+        with self._lock:
+            if self._remote is None and self._pending is None:
+                try: self._fetch()
+                except Exception as e: print(f"GitHub Load Error: {e}")
+            current = self._pending if self._pending is not None else (self._remote or EMPTY)
+            base = base if base is not None else (self._remote or EMPTY)
+            if self._pending is None: self._first_pending = time.time()
+            self._pending = merge3(base, normalize(new_data), current)
+            self.stats["saves"] += 1
+            self._schedule()
+        self._save_mirror()
+        if wait: return self.flush()
+        with self._lock: return not self._failures
+
+    def status(self):
+        # ("saved" / "pending" / "failed", 마지막 에러)
+        with self._lock:
+            if self._pending is None: return "saved", ""
+            return ("failed" if self._failures else "pending"), self.stats["last_error"]
+
+    def _schedule(self, delay=None):
+        if self._timer: self._timer.cancel()
+        if delay is None: delay = min(DEBOUNCE_SEC, max(self._first_pending + MAX_DELAY_SEC - time.time(), 0))
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _put(self, data, sha):
+        json_str = json.dumps(data, ensure_ascii=False, indent=4)
+        body = {"message": self.message, "content": base64.b64encode(json_str.encode('utf-8')).decode('utf-8')}
+        if sha: body["sha"] = sha
+        return http_put(self.url, headers=self.headers, json=body)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if self._pending is None: return True
+                data, base, sha = copy.deepcopy(self._pending), self._remote, self._sha
+            for _ in range(MAX_RETRIES):
+                try:
+                    r = self._put(data, sha)
+                    if r.status_code in (200, 201):
+                        with self._lock:
+                            self._sha = r.json().get('content', {}).get('sha')
+                            self._etag = None  # 새 커밋의 ETag 는 다음 전체 조회 때 받음
+                            self._remote = data
+                            self._checked_at = time.time()
+                            # 커밋하는 동안 새로 들어온 수정이 없으면 대기열 비움
+                            if self._pending == data: self._pending = None
+                            else: self._schedule()
+                            self._failures = 0
+                            self.stats["commits"] += 1; self.stats["last_error"] = ""
+                        self._save_mirror()
+                        return True
+                    if r.status_code not in (409, 422):
+                        raise Exception(f"HTTP {r.status_code}: {r.text[:200]}")
+                    # SHA 충돌: 다른 곳에서 먼저 커밋함 → 최신본 위에 내 변경분을 다시 얹음
+                    self.stats["conflicts"] += 1
+                    remote, ok = self._fetch()
+                    if not ok: raise Exception("원격 최신본 조회 실패")
+                    with self._lock:
+                        self._pending = merge3(base, self._pending, remote)
+                        data, base, sha = copy.deepcopy(self._pending), remote, self._sha
+                except Exception as e:
+                    print(f"GitHub Save Error: {e}")
+                    return self._failed(str(e))
+            return self._failed("SHA 충돌 재시도 초과")
+
+    def _failed(self, message):
+        # 수정분은 그대로 두고 간격을 늘려 가며 다시 커밋
+        with self._lock:
+            self._failures += 1
+            self.stats["errors"] += 1; self.stats["last_error"] = message
+            if self._pending is not None:
+                self._schedule(min(RETRY_BASE_SEC * 2 ** (self._failures - 1), RETRY_MAX_SEC))
+        return False
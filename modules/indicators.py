@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------------------------
+# 벡터화 지표 엔진
+# (날짜 x 종목) 2차원 배열 위에서 MA/RSI/MACD/ATR/볼린저밴드를 한 번에 계산합니다.
+# 종목마다 상장일/거래정지일이 달라 생기는 빈칸(NaN)은 종목별로 위쪽으로 압축해서
+# 계산한 뒤 원래 자리로 되돌리므로, 종목 하나씩 pandas rolling 으로 계산한 값과 같습니다.
+# ------------------------------------------------------------------------------
+MA_WINDOWS = [20, 60, 120, 240, 5]
+INDICATOR_COLUMNS = ["MA20", "MA60", "MA120", "MA240", "MA5", "RSI", "ATR", "MACD", "MACD_Signal", "BB_Upper", "BB_Lower"]
+
+def _rolling_sum(x, window):
+    # 앞쪽 window-1 칸은 NaN (pandas rolling 의 min_periods=window 와 동일)
+    cs = np.cumsum(x, axis=0)
+    out = np.full(x.shape, np.nan)
+    if len(x) < window: return out
+    out[window - 1:] = cs[window - 1:]
+    out[window:] -= cs[:-window]
+    return out
+
+def rolling_mean(x, window):
+    return _rolling_sum(x, window) / window
+
+def rolling_std(x, window):
+    # 자릿수 손실을 줄이기 위해 종목별 첫 값 기준으로 평행이동 후 계산 (ddof=1)
+    base = np.nan_to_num(x[:1])
+    d = x - base
+    s = _rolling_sum(d, window)
+    sq = _rolling_sum(d * d, window)
+    var = (sq - s * s / window) / (window - 1)
+    return np.sqrt(np.clip(var, 0, None))
+
+def ewm_mean(x, span):
+    # pandas ewm(span, adjust=False).mean() 과 같은 점화식
+    alpha = 2.0 / (span + 1)
+    out = np.empty(x.shape)
+    if len(x) == 0: return out
+    out[0] = x[0]
+    for t in range(1, len(x)):
+        out[t] = alpha * x[t] + (1 - alpha) * out[t - 1]
+    return out
+
+def _compact(valid):
+    # 종목별로 유효한 행을 위로 모으는 순서 (안정 정렬이라 날짜 순서는 유지)
+    return np.argsort(~valid, axis=0, kind="stable")
+
+def compute_indicator_arrays(close, high, low):
+    close = np.asarray(close, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    valid = ~np.isnan(close)
+    order = _compact(valid)
+    c = np.take_along_axis(close, order, axis=0)
+    h = np.take_along_axis(high, order, axis=0)
+    lo = np.take_along_axis(low, order, axis=0)
+
+    res = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for w in MA_WINDOWS:
+            res[f"MA{w}"] = rolling_mean(c, w)
+
+        delta = np.diff(c, axis=0, prepend=np.nan)
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        rs = rolling_mean(gain, 14) / rolling_mean(loss, 14)
+        res["RSI"] = 100 - (100 / (1 + rs))
+
+        prev_close = np.vstack([np.full((1, c.shape[1]), np.nan), c[:-1]])
+        tr = np.fmax(np.fmax(h - lo, np.abs(h - prev_close)), np.abs(lo - prev_close))
+        res["ATR"] = rolling_mean(np.nan_to_num(tr), 14)
+
+        macd = ewm_mean(c, 12) - ewm_mean(c, 26)
+        res["MACD"] = macd
+        res["MACD_Signal"] = ewm_mean(macd, 9)
+
+        std20 = rolling_std(c, 20)
+        res["BB_Upper"] = res["MA20"] + std20 * 2
+        res["BB_Lower"] = res["MA20"] - std20 * 2
+
+    # 압축했던 행을 원래 날짜 위치로 되돌리고, 시세가 없는 칸은 NaN 처리
+    for key, arr in res.items():
+        out = np.empty(arr.shape)
+        np.put_along_axis(out, order, arr, axis=0)
+        out[~valid] = np.nan
+        res[key] = out
+    return res
+
+def compute_indicators(panel):
+    # panel: load_price_panel 결과 (컬럼 = (필드, 종목코드)). 지표 필드를 붙여서 반환
+    if panel is None or panel.empty: return panel
+    close = panel["Close"]
+    res = compute_indicator_arrays(close.to_numpy(), panel["High"].to_numpy(), panel["Low"].to_numpy())
+    frames = {f: panel[f] for f in panel.columns.get_level_values("Field").unique()}
+    for key in INDICATOR_COLUMNS:
+        frames[key] = pd.DataFrame(res[key], index=close.index, columns=close.columns)
+    out = pd.concat(frames, axis=1)
+    out.columns.names = ["Field", "Code"]
+    return out
+
+def add_indicators(df):
+    # 단일 종목 history 에 지표 컬럼 추가 (기존 calculate_sniper_score 컬럼과 동일)
+    df = df.copy()
+    res = compute_indicator_arrays(df[["Close"]].to_numpy(), df[["High"]].to_numpy(), df[["Low"]].to_numpy())
+    for key in INDICATOR_COLUMNS:
+        df[key] = res[key][:, 0]
+    return df
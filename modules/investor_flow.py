@@ -0,0 +1,55 @@
+import time
+import datetime
+import pandas as pd
+from pykrx import stock
+from modules.cache import TTLCache
+
+# ------------------------------------------------------------------------------
+# 투자자별 순매수 캐시
+# 종목당 하루에 가장 긴 구간(FLOW_DAYS) 하나만 받아두고,
+# 짧은 구간(수급 7일, 최근 3일 합계 등)은 모두 이 데이터를 잘라서 답합니다.
+# ------------------------------------------------------------------------------
+FLOW_DAYS = 100
+_cache = TTLCache(ttl=1800, maxsize=512)
+
+def _fetch(code, today):
+    start = (today - datetime.timedelta(days=FLOW_DAYS)).strftime("%Y%m%d")
+    return stock.get_market_investor_net_purchase_by_date(start, today.strftime("%Y%m%d"), code)
+
+def get_investor_flow(code):
+    today = datetime.date.today()
+    return _cache.get_or_compute((code, today.isoformat()), lambda: _fetch(code, today))
+
+def investor_flow_window(code, days):
+    df = get_investor_flow(code)
+    if df.empty: return df
+    start = pd.Timestamp(datetime.date.today() - datetime.timedelta(days=days))
+    return df[df.index >= start]
+
+def investor_tail_sum(code, n=3, days=7):
+    # 최근 days 일 구간의 마지막 n 거래일 외국인/기관 순매수 합계
+    df = investor_flow_window(code, days).tail(n)
+    if df.empty: return 0, 0
+    return df['외국인'].sum(), df['기관합계'].sum()
+
+# ------------------------------------------------------------------------------
+# 실행 간에 이어 쓰는 수급 꼬리 (daily_bot 상태 파일용)
+# tail = {"rows": [[날짜, 외국인, 기관합계], ...], "synced_at": 시각}
+# 마지막 저장일(당일이면 장중 값이라 다시 받음)부터 오늘까지만 새로 받고, days 일 이전 행은 버립니다.
+# ------------------------------------------------------------------------------
+def update_flow_tail(code, tail=None, days=7):
+    today = datetime.date.today()
+    cutoff = today - datetime.timedelta(days=days)
+    rows = list((tail or {}).get("rows") or [])
+    start = max(cutoff, datetime.date.fromisoformat(rows[-1][0])) if rows else cutoff
+    df = stock.get_market_investor_net_purchase_by_date(start.strftime("%Y%m%d"), today.strftime("%Y%m%d"), code)
+    merged = {r[0]: r[1:] for r in rows}
+    if not df.empty:
+        for idx, row in df.iterrows():
+            merged[pd.Timestamp(idx).strftime("%Y-%m-%d")] = [float(row['외국인']), float(row['기관합계'])]
+    rows = [[d] + v for d, v in sorted(merged.items()) if d >= cutoff.isoformat()]
+    return {"rows": rows, "synced_at": time.time()}
+
+def flow_tail_sum(tail, n=3):
+    rows = ((tail or {}).get("rows") or [])[-n:]
+    return sum(r[1] for r in rows), sum(r[2] for r in rows)
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import datetime
+import threading
+import pandas as pd
+import FinanceDataReader as fdr
+from modules.paths import data_path
+
+# ------------------------------------------------------------------------------
+# KRX 상장 종목 목록 스냅샷
+# - 목록을 .quant_cache/krx_listing.parquet 로 저장해 두고, 시작할 때는 디스크에서 바로 읽습니다.
+# - 저장된 목록이 오늘(거래일 기준)보다 오래됐으면 백그라운드 스레드가 한 번만 새로 받습니다.
+# - 스냅샷이 아예 없을 때(첫 실행)만 화면이 기다립니다.
+# - listing_version() 은 목록이 바뀔 때마다 올라가서, 검색 인덱스 재생성 키로 씁니다.
+# ------------------------------------------------------------------------------
+SNAPSHOT_FILE = "krx_listing.parquet"
+META_FILE = "krx_listing.json"
+KST = datetime.timezone(datetime.timedelta(hours=9))
+RETRY_SEC = 600  # 백그라운드 갱신이 실패했을 때 다시 시도하기까지의 간격
+
+_lock = threading.Lock()
+_load_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_refreshing = False
+_last_attempt = 0.0
+_listing = None
+_trade_day = None
+_version = 0
+
+def current_trade_day():
+    # 주말은 직전 금요일로 봄 (휴장일은 목록이 바뀌지 않으므로 하루 더 받아도 무방)
+    d = datetime.datetime.now(KST).date()
+    while d.weekday() >= 5: d -= datetime.timedelta(days=1)
+    return d.isoformat()
+
+def fetch_listing():
+    try:
+        df = fdr.StockListing('KRX')
+        if not df.empty: return df
+    except: pass
+
+    try:
+        from pykrx import stock
+        target_date = datetime.datetime.now()
+        for _ in range(5):
+            d_str = target_date.strftime("%Y%m%d")
+            try:
+                tickers = stock.get_market_ticker_list(d_str, market="KOSPI")
+                if tickers: break
+            except: pass
+            target_date -= datetime.timedelta(days=1)
+        d_str = target_date.strftime("%Y%m%d")
+        df_kospi = stock.get_market_cap_by_ticker(d_str, market="KOSPI")
+        df_kosdaq = stock.get_market_cap_by_ticker(d_str, market="KOSDAQ")
+        df_list = []
+        if not df_kospi.empty:
+            df_kospi = df_kospi.reset_index()
+            df_list.append(df_kospi[['티커', '종목명']].rename(columns={'티커': 'Code', '종목명': 'Name'}))
+        if not df_kosdaq.empty:
+            df_kosdaq = df_kosdaq.reset_index()
+            df_list.append(df_kosdaq[['티커', '종목명']].rename(columns={'티커': 'Code', '종목명': 'Name'}))
+        if df_list: return pd.concat(df_list, ignore_index=True)
+    except Exception as e:
+        print(f"KRX 목록 pykrx 조회 에러: {e}")
+    return pd.DataFrame()
+
+def _compact(df):
+    # parquet 저장이 되도록 섞인 타입의 object 열은 문자열로, 코드는 6자리 문자열로
+    df = df.reset_index(drop=True).copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    df['Code'] = df['Code'].astype(str).str.zfill(6)
+    return df
+
+def _save_snapshot(df, trade_day):
+    try:
+        path = data_path(SNAPSHOT_FILE)
+        df.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        with open(data_path(META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"trade_day": trade_day, "rows": len(df)}, f)
+    except Exception as e:
+        print(f"KRX 목록 스냅샷 저장 에러: {e}")
+
+def _load_snapshot():
+    try:
+        path = data_path(SNAPSHOT_FILE)
+        if not os.path.exists(path): return None, None
+        with open(data_path(META_FILE), "r", encoding="utf-8") as f: meta = json.load(f)
+        return pd.read_parquet(path), meta.get("trade_day")
+    except Exception as e:
+        print(f"KRX 목록 스냅샷 읽기 에러: {e}")
+        return None, None
+
+def _set_listing(df, trade_day):
+    global _listing, _trade_day, _version
+    with _lock:
+        _listing, _trade_day = df, trade_day
+        _version += 1
+
+def refresh_listing():
+    # 새로 받아서 메모리/디스크 모두 교체. 실패하면 기존 목록 유지
+    day = current_trade_day()
+    df = fetch_listing()
+    if df.empty or 'Code' not in df or 'Name' not in df: return False
+    df = _compact(df)
+    _set_listing(df, day)
+    _save_snapshot(df, day)
+    return True
+
+def _refresh_in_background():
+    global _refreshing, _last_attempt
+    with _refresh_lock:
+        if _refreshing or time.time() - _last_attempt < RETRY_SEC: return
+        _refreshing, _last_attempt = True, time.time()
+    def run():
+        global _refreshing
+        try: refresh_listing()
+        finally:
+            with _refresh_lock: _refreshing = False
+    threading.Thread(target=run, daemon=True).start()
+
+def load_listing():
+    if _listing is None:
+        with _load_lock:
+            if _listing is not None: return _listing
+            df, day = _load_snapshot()
+            if df is not None and not df.empty: _set_listing(df, day)
+            elif not refresh_listing(): return pd.DataFrame()
+    if _trade_day != current_trade_day(): _refresh_in_background()
+    return _listing
+
+def listing_version():
+    return _version
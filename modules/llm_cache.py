@@ -0,0 +1,101 @@
+import re
+import json
+import math
+import time
+import hashlib
+import sqlite3
+import threading
+from modules.paths import data_path
+
+# ------------------------------------------------------------------------------
+# LLM 응답 디스크 캐시 (SQLite)
+# - 키는 "정규화한 뉴스 헤드라인 + 구간화한 컨텍스트" 의 해시라서, 환율/수익률이
+#   조금씩 흔들려도 같은 뉴스면 같은 답을 재사용합니다.
+# - 프로세스가 재시작돼도 남아 있고, 모든 세션이 같이 씁니다.
+# - TTL 이 지난 항목은 버리고, MAX_ENTRIES 를 넘으면 오래 안 쓴 것부터 지웁니다.
+# ------------------------------------------------------------------------------
+DB_FILE = "llm_cache.db"
+DEFAULT_TTL = 3 * 3600
+MAX_ENTRIES = 2000
+KEY_VERSION = "news-v1"
+
+_lock = threading.Lock()
+_conn = None
+
+def _get_conn():
+    global _conn
+    with _lock:
+        if _conn is None:
+            conn = sqlite3.connect(data_path(DB_FILE), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+            _conn = conn
+        return _conn
+
+def normalize_headline(title):
+    return re.sub(r"\s+", " ", str(title)).strip().lower()
+
+def _bucket(value, step):
+    try: return int(math.floor(float(value) / step))
+    except: return 0
+
+def news_cache_key(company_name, news_titles, context):
+    context = context or {}
+    price = float(context.get('current_price', 0) or 0)
+    usd = float(context.get('usd_krw_change', 0.0) or 0.0)
+    payload = {
+        "v": KEY_VERSION,
+        "name": company_name,
+        "titles": sorted({normalize_headline(t) for t in news_titles if str(t).strip()}),
+        "trend": context.get('trend', ''),
+        "cycle": context.get('cycle', ''),
+        "supply": context.get('supply', ''),
+        "holding": bool(context.get('is_holding', False)),
+        "signal": context.get('quant_signal', ''),
+        "round_fig": context.get('round_figure_msg', ''),
+        # 프롬프트 힌트가 바뀌는 경계(±0.5%, +15%)와 가격/수익률 구간만 키에 반영
+        "usd": "up" if usd > 0.5 else ("down" if usd < -0.5 else "flat"),
+        "surge": float(context.get('price_surge', 0.0) or 0.0) > 15,
+        "price": int(round(math.log(price) / math.log(1.02))) if price > 0 else 0,
+        "profit": _bucket(context.get('profit_rate', 0.0), 5) if context.get('is_holding') else 0,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def cache_get(key, ttl=DEFAULT_TTL):
+    conn = _get_conn()
+    now = time.time()
+    try:
+        with _lock:
+            row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key=?", (key,)).fetchone()
+            if row is None: return None
+            if row[1] + ttl < now:
+                conn.execute("DELETE FROM llm_cache WHERE key=?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE llm_cache SET accessed_at=? WHERE key=?", (now, key))
+            conn.commit()
+        return json.loads(row[0])
+    except Exception as e:
+        print(f"LLM cache read error: {e}")
+        return None
+
+def cache_set(key, value):
+    conn = _get_conn()
+    now = time.time()
+    try:
+        with _lock:
+            conn.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)", (key, json.dumps(value, ensure_ascii=False), now, now))
+            conn.execute("""
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (MAX_ENTRIES,))
+            conn.commit()
+    except Exception as e:
+        print(f"LLM cache write error: {e}")
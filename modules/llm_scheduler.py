@@ -0,0 +1,104 @@
+import os
+import time
+import heapq
+import random
+import itertools
+import threading
+
+# ------------------------------------------------------------------------------
+# 프로세스 전역 LLM 호출 스케줄러 (토큰 버킷 + 우선순위 대기열)
+# - 분당 요청 수(rpm) 예산 안에서만 호출을 내보내고, 넘치는 호출은 줄 세워 기다리게 합니다.
+# - 우선순위 숫자가 작을수록 먼저 (보유 종목 = PRIORITY_HOLDING).
+# - 429 를 받으면 backoff() 로 버킷 전체를 잠시 멈춰서 동시에 다시 몰려드는 것을 막습니다.
+# - metrics() 로 대기열 길이/대기 시간/재시도 횟수를 확인할 수 있습니다.
+# ------------------------------------------------------------------------------
+PRIORITY_HOLDING = 0
+PRIORITY_NORMAL = 1
+
+class LLMScheduler:
+    def __init__(self, rpm=15, burst=None, max_retries=4, base_delay=1.0, max_delay=30.0, max_wait=90.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._stats = {"requests": 0, "rate_limited": 0, "retries": 0, "timeouts": 0, "total_wait": 0.0, "max_wait": 0.0, "max_depth": 0}
+        self.configure(rpm, burst)
+
+    def configure(self, rpm, burst=None):
+        # 값이 같으면 아무것도 안 함. 바뀌면 남은 토큰은 유지(새 용량까지만)해서 설정만으로 버스트가 생기지 않게 함
+        rpm = max(float(rpm), 1.0)
+        capacity = float(burst) if burst else max(1.0, rpm / 4)
+        with self._cond:
+            if getattr(self, "rpm", None) == rpm and self.capacity == capacity: return
+            now = time.time()
+            if hasattr(self, "_tokens"): self._refill(now)
+            else: self._tokens = capacity
+            self.rpm, self.capacity = rpm, capacity
+            self._tokens = min(self._tokens, capacity)
+            self._updated = now
+            self._cond.notify_all()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rpm / 60.0)
+        self._updated = now
+
+    def acquire(self, priority=PRIORITY_NORMAL):
+        # 토큰을 얻으면 True, max_wait 안에 못 얻으면 False
+        start = time.time()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            self._stats["max_depth"] = max(self._stats["max_depth"], len(self._waiting))
+            try:
+                while True:
+                    now = time.time()
+                    self._refill(now)
+                    if self._waiting[0] == ticket and now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    if now - start >= self.max_wait:
+                        self._stats["timeouts"] += 1
+                        return False
+                    if self._waiting[0] == ticket:
+                        wait = max(self._paused_until - now, (1 - self._tokens) * 60.0 / self.rpm, 0.01)
+                    else:
+                        wait = 1.0  # 앞 순번이 빠지면 notify 로 깨어남
+                    self._cond.wait(min(wait, self.max_wait - (now - start)))
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            waited = time.time() - start
+            self._stats["requests"] += 1
+            self._stats["total_wait"] += waited
+            self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+            return True
+
+    def backoff(self, attempt, retry_after=None):
+        # 지수 백오프 + 지터. 서버가 Retry-After 를 주면 그 이상 기다림
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt)) * random.uniform(0.5, 1.5)
+        if retry_after: delay = max(delay, retry_after)
+        with self._cond:
+            self._stats["rate_limited"] += 1
+            self._paused_until = max(self._paused_until, time.time() + delay)
+            self._tokens = 0.0
+            self._cond.notify_all()
+        return delay
+
+    def record_retry(self):
+        with self._cond: self._stats["retries"] += 1
+
+    def metrics(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queue_depth"] = len(self._waiting)
+            stats["avg_wait"] = stats["total_wait"] / stats["requests"] if stats["requests"] else 0.0
+            stats["rpm"] = self.rpm
+            stats["paused_for"] = max(self._paused_until - time.time(), 0.0)
+            return stats
+
+scheduler = LLMScheduler(rpm=float(os.environ.get("GEMINI_RPM", 15)))
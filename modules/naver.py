@@ -0,0 +1,57 @@
+import pandas as pd
+from io import StringIO
+from bs4 import BeautifulSoup
+from modules.net import http_get
+
+# ------------------------------------------------------------------------------
+# 네이버 금융 종목 메인 페이지 (item/main.naver)
+# 한 번 받아서 한 번만 파싱하고, PER/PBR/배당수익률과 최근 연간 실적 표를 함께 돌려줍니다.
+# 네트워크 실패/200 이 아닌 응답은 예외로 올려서, 호출하는 쪽 캐시(st.cache_data)에 빈 값이 남지 않게 합니다.
+# ------------------------------------------------------------------------------
+ITEM_MAIN_URL = "https://finance.naver.com/item/main.naver?code={code}"
+
+def _parse_valuation(soup):
+    def get_val_by_id(id_name):
+        tag = soup.select_one(f"#{id_name}")
+        if tag:
+            txt = tag.text.replace(',', '').replace('%', '').replace('배', '').strip()
+            try: return float(txt)
+            except: return 0.0
+        return 0.0
+    return get_val_by_id("_per"), get_val_by_id("_pbr"), get_val_by_id("_dvr")
+
+def _parse_annual(html):
+    try: df_list = pd.read_html(StringIO(html), encoding='euc-kr')
+    except: return pd.DataFrame()
+    for df in df_list:
+        if '최근 연간 실적' in str(df.columns) or '매출액' in str(df.iloc[:,0].values):
+            df = df.set_index(df.columns[0])
+            fin_data = []
+            cols = df.columns[-5:-1]
+            for col in cols:
+                try:
+                    col_name = col[1] if isinstance(col, tuple) else col
+                    val_sales = df.loc['매출액', col] if '매출액' in df.index else 0
+                    val_op = df.loc['영업이익', col] if '영업이익' in df.index else 0
+                    val_net = df.loc['당기순이익', col] if '당기순이익' in df.index else 0
+                    fin_data.append({
+                        "Date": str(col_name).strip(),
+                        "매출액": float(val_sales) if val_sales != '-' and pd.notnull(val_sales) else 0,
+                        "영업이익": float(val_op) if val_op != '-' and pd.notnull(val_op) else 0,
+                        "당기순이익": float(val_net) if val_net != '-' and pd.notnull(val_net) else 0
+                    })
+                except: continue
+            return pd.DataFrame(fin_data)
+    return pd.DataFrame()
+
+def fetch_item_main(code):
+    res = http_get(ITEM_MAIN_URL.format(code=code), headers={'User-Agent': 'Mozilla/5.0'})
+    if res.status_code != 200: raise Exception(f"Naver item page HTTP {res.status_code} ({code})")
+    html = res.text
+    page = {"per": 0.0, "pbr": 0.0, "div": 0.0, "annual": pd.DataFrame()}
+    try:
+        page["per"], page["pbr"], page["div"] = _parse_valuation(BeautifulSoup(html, 'html.parser'))
+        page["annual"] = _parse_annual(html)
+    except Exception as e:
+        print(f"Naver item page parse error ({code}): {e}")
+    return page
@@ -0,0 +1,60 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ------------------------------------------------------------------------------
+# 공용 HTTP 세션 (Naver / GitHub / Telegram / Gemini 등 모든 외부 호출)
+# - 호스트별 커넥션 풀을 재사용(keep-alive)해서 매번 TLS 연결을 새로 맺지 않습니다.
+# - 호스트별 동시 연결 수 제한(pool_block) + 기본 타임아웃 + GET 재시도(지수 백오프).
+# - POST/PUT 은 중복 실행 위험이 있어 자동 재시도하지 않습니다.
+# - retry=False 로 부르면 재시도 없는 세션을 씁니다. (뉴스처럼 전체 제한 시간이 중요한 호출)
+# ------------------------------------------------------------------------------
+DEFAULT_TIMEOUT = (5, 15)  # (연결, 읽기) 초
+DEFAULT_POOL_SIZE = 10
+HOST_POOL_SIZES = {
+    "https://finance.naver.com": 10,
+    "https://search.naver.com": 5,
+    "https://news.google.com": 5,
+    "https://api.github.com": 4,
+    "https://api.telegram.org": 2,
+    "https://generativelanguage.googleapis.com": 10,
+}
+
+_lock = threading.Lock()
+_sessions = {}  # {재시도 여부: 세션}
+
+def _make_adapter(pool_size, retry=True):
+    if retry:
+        retry = Retry(
+            total=3, connect=3, read=2, backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+    else: retry = Retry(total=0, raise_on_status=False)
+    return HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+
+def get_session(retry=True):
+    with _lock:
+        if retry not in _sessions:
+            session = requests.Session()
+            session.mount("https://", _make_adapter(DEFAULT_POOL_SIZE, retry))
+            session.mount("http://", _make_adapter(DEFAULT_POOL_SIZE, retry))
+            for prefix, size in HOST_POOL_SIZES.items():
+                session.mount(prefix, _make_adapter(size, retry))
+            _sessions[retry] = session
+        return _sessions[retry]
+
+def http_request(method, url, retry=True, **kwargs):
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return get_session(bool(retry)).request(method, url, **kwargs)
+
+def http_get(url, **kwargs):
+    return http_request("GET", url, **kwargs)
+
+def http_post(url, **kwargs):
+    return http_request("POST", url, **kwargs)
+
+def http_put(url, **kwargs):
+    return http_request("PUT", url, **kwargs)
@@ -0,0 +1,84 @@
+import re
+import bisect
+import unicodedata
+import concurrent.futures
+
+# ------------------------------------------------------------------------------
+# 뉴스 수집 보조
+# - fetch_sources(): 여러 뉴스 소스를 동시에 호출하고, 소스별 제한 시간을 넘긴 것은 버립니다.
+#   호출마다 소스 수만큼의 스레드를 새로 띄워서 모든 소스가 바로 시작합니다. (공용 풀에서 줄 서다
+#   요청도 못 보내고 시간 초과되거나, 늦은 요청이 다른 종목의 자리를 잡고 있지 않도록)
+#   소스 함수는 http_get(..., retry=False) 로 불러서 요청 하나가 제한 시간을 크게 넘지 않게 합니다.
+# - title_fingerprint(): 공백/괄호 머리표/문장부호만 다른 제목을 같은 기사로 봅니다.
+# - strip_publisher(): Google 뉴스 RSS 제목 끝의 " - 언론사" 를 그 피드가 알려준 언론사 이름일 때만 뗍니다.
+# ------------------------------------------------------------------------------
+NEWS_SOURCE_TIMEOUT = 6  # 초
+
+_BRACKET_TAG = re.compile(r"[\[\(【<《「『][^\]\)】>》」』]{0,12}[\]\)】>》」』]")
+_NON_WORD = re.compile(r"[\W_]+")
+
+def fetch_sources(sources, timeout=NEWS_SOURCE_TIMEOUT):
+    # sources = {"이름": 함수}. 결과는 {"이름": 반환값}, 실패하거나 시간 초과면 None
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(len(sources), 1), thread_name_prefix="news")
+    try:
+        futures = {name: pool.submit(fn) for name, fn in sources.items()}
+        done, _ = concurrent.futures.wait(list(futures.values()), timeout=timeout)
+    finally: pool.shutdown(wait=False)
+    results = {}
+    for name, fut in futures.items():
+        if fut not in done:
+            print(f"뉴스 소스 시간 초과: {name}")
+            results[name] = None; continue
+        try: results[name] = fut.result()
+        except Exception as e:
+            print(f"뉴스 소스 에러 ({name}): {e}")
+            results[name] = None
+    return results
+
+def title_fingerprint(title):
+    t = unicodedata.normalize("NFKC", str(title))
+    t = _BRACKET_TAG.sub("", t)
+    return _NON_WORD.sub("", t).lower()
+
+def strip_publisher(title, publisher):
+    title, publisher = str(title).rstrip(), str(publisher or "").strip()
+    if publisher:
+        for sep in (" - ", " | ", " – ", " — "):
+            if title.endswith(sep + publisher): return title[:-len(sep + publisher)].rstrip()
+    return title
+
+def dedupe_titles(titles):
+    # 처음 나온 제목을 남기고 순서는 유지
+    seen = set(); out = []
+    for t in titles:
+        fp = title_fingerprint(t)
+        if not fp or fp in seen: continue
+        seen.add(fp); out.append(t)
+    return out
+
+# ------------------------------------------------------------------------------
+# 여러 키워드를 한 번에 찾는 매처
+# - 모든 키워드를 하나의 정규식(긴 것 우선, lookahead)으로 묶어 제목 묶음을 한 번에 훑습니다.
+# - lookahead 라 겹치는 위치도 모두 잡히고, 같은 위치에서 짧은 키워드(긴 키워드의 접두어)는
+#   prefixes 표로 보충합니다. (예: "공매도" 안의 "매도" 도 따로 셈)
+# - 제목 하나에서 같은 키워드는 한 번만 셉니다. (기존 `w in title` 과 동일)
+# ------------------------------------------------------------------------------
+class KeywordMatcher:
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(w) for w in ordered) + "))")
+        self._prefixes = {w: [p for p in self.keywords if p != w and w.startswith(p)] for w in self.keywords}
+
+    def find(self, titles):
+        # [(제목 번호, 키워드), ...] 제목별 중복 없이
+        parts = [str(t) for t in titles]  # 구분자 "\n" 은 키워드에 없으므로 제목 경계를 넘는 매치는 없음
+        starts = []; offset = 0
+        for p in parts: starts.append(offset); offset += len(p) + 1
+        hits = set()
+        for m in self._pattern.finditer("\n".join(parts)):
+            idx = bisect.bisect_right(starts, m.start()) - 1
+            w = m.group(1)
+            hits.add((idx, w))
+            for p in self._prefixes[w]: hits.add((idx, p))
+        return sorted(hits)
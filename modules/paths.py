@@ -0,0 +1,11 @@
+import os
+
+# ------------------------------------------------------------------------------
+# 로컬 저장소 위치: 가격 DB, 상태 파일 등 디스크 캐시가 모두 이 폴더에 모입니다.
+# (GitHub Actions에서는 actions/cache로 이 폴더를 실행 간에 보존합니다)
+# ------------------------------------------------------------------------------
+DATA_DIR = os.environ.get("QUANT_DATA_DIR", ".quant_cache")
+
+def data_path(filename):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
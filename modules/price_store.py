@@ -0,0 +1,152 @@
+import sqlite3
+import threading
+import datetime
+import time
+import concurrent.futures
+import pandas as pd
+import FinanceDataReader as fdr
+from modules.paths import data_path
+
+# ------------------------------------------------------------------------------
+# 로컬 가격 저장소 (SQLite)
+# - 종목코드별 일봉(OHLCV)을 디스크에 쌓아두고, 마지막 저장일 이후 봉만 새로 받아옵니다.
+# - 당일 봉은 장중에 계속 바뀌므로 REFRESH_SEC 간격으로 마지막 봉부터 다시 덮어씁니다.
+# - 그때 직전 확정 봉도 같이 받아서 저장된 값과 비교하고, 다르면(분할/배당으로 수정주가가 바뀜)
+#   저장된 구간 전체를 새 기준으로 다시 받습니다.
+# ------------------------------------------------------------------------------
+DB_FILE = "price_store.db"
+REFRESH_SEC = 300
+COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Change"]
+
+_lock = threading.RLock()
+_code_locks = {}
+_conn = None
+
+def _get_conn():
+    global _conn
+    with _lock:
+        if _conn is None:
+            conn = sqlite3.connect(data_path(DB_FILE), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS ohlcv (
+                    code TEXT NOT NULL, date TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL, change REAL,
+                    PRIMARY KEY (code, date)
+                );
+                CREATE TABLE IF NOT EXISTS sync_meta (
+                    code TEXT PRIMARY KEY, covered_from TEXT, synced_at REAL
+                );
+            """)
+            _conn = conn
+        return _conn
+
+def _code_lock(code):
+    # 같은 종목을 여러 스레드가 동시에 요청해도 네트워크 호출은 한 번만
+    with _lock:
+        if code not in _code_locks: _code_locks[code] = threading.Lock()
+        return _code_locks[code]
+
+def _save_bars(code, df):
+    if df is None or df.empty: return
+    rows = []
+    for idx, row in df.iterrows():
+        vals = [row.get(c) for c in COLUMNS]
+        vals = [float(v) if pd.notnull(v) else None for v in vals]
+        rows.append((code, pd.Timestamp(idx).strftime("%Y-%m-%d"), *vals))
+    conn = _get_conn()
+    with _lock:
+        conn.executemany("INSERT OR REPLACE INTO ohlcv VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+
+def _replace_bars(code, df):
+    # 종목의 저장된 봉을 모두 df 로 교체 (읽는 쪽이 중간 상태를 보지 않도록 잠근 채로)
+    if df is None or df.empty: return
+    conn = _get_conn()
+    with _lock:
+        conn.execute("DELETE FROM ohlcv WHERE code=?", (code,))
+        _save_bars(code, df)
+
+def _is_adjusted(df, prev):
+    # prev = (날짜, 저장된 종가). 새로 받은 같은 날짜 종가가 다르면 True
+    if df is None or df.empty or prev[1] is None: return False
+    match = df[[pd.Timestamp(i).strftime("%Y-%m-%d") == prev[0] for i in df.index]]
+    if match.empty or pd.isnull(match['Close'].iloc[0]): return False
+    return abs(float(match['Close'].iloc[0]) - prev[1]) > max(abs(prev[1]) * 1e-4, 1e-6)
+
+def _set_meta(code, covered_from, synced_at):
+    conn = _get_conn()
+    with _lock:
+        conn.execute("INSERT OR REPLACE INTO sync_meta VALUES (?, ?, ?)", (code, covered_from, synced_at))
+        conn.commit()
+
+def sync_history(code, days=365):
+    conn = _get_conn()
+    start = (datetime.date.today() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+    with _code_lock(code):
+        with _lock:
+            meta = conn.execute("SELECT covered_from, synced_at FROM sync_meta WHERE code=?", (code,)).fetchone()
+            last = conn.execute("SELECT MAX(date) FROM ohlcv WHERE code=?", (code,)).fetchone()[0]
+        covered_from, synced_at = meta if meta else (None, 0)
+
+        try:
+            if last is None or covered_from is None or covered_from > start:
+                # 처음 보는 종목이거나 더 긴 기간을 요청받은 경우에만 전체 구간 수집
+                _save_bars(code, fdr.DataReader(code, start))
+                _set_meta(code, start, time.time())
+            elif time.time() - (synced_at or 0) >= REFRESH_SEC:
+                # 마지막 저장일(당일 미완성 봉일 수 있음) 직전의 확정 봉부터 이후 봉만 수집
+                with _lock:
+                    prev = conn.execute("SELECT date, close FROM ohlcv WHERE code=? AND date<? ORDER BY date DESC LIMIT 1", (code, last)).fetchone()
+                df = fdr.DataReader(code, prev[0] if prev else last)
+                if prev and _is_adjusted(df, prev):
+                    # 수정주가 기준이 바뀜 → 저장된 구간 전체를 다시 받음
+                    _replace_bars(code, fdr.DataReader(code, covered_from))
+                else: _save_bars(code, df)
+                _set_meta(code, covered_from, time.time())
+        except Exception as e:
+            # 네트워크 실패 시에는 저장된 데이터로 계속 진행
+            print(f"Price sync error ({code}): {e}")
+
+def _read_bars(codes, days):
+    start = (datetime.date.today() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+    marks = ",".join("?" * len(codes))
+    conn = _get_conn()
+    with _lock:
+        df = pd.read_sql_query(
+            f"SELECT code, date, open, high, low, close, volume, change FROM ohlcv WHERE code IN ({marks}) AND date>=? ORDER BY code, date",
+            conn, params=(*codes, start)
+        )
+    df.columns = ["Code", "Date"] + COLUMNS
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+def load_history(code, days=365):
+    sync_history(code, days)
+    df = _read_bars([code], days)
+    if df.empty: return pd.DataFrame(columns=COLUMNS)
+    return df.drop(columns="Code").set_index("Date")
+
+# ------------------------------------------------------------------------------
+# 여러 종목 일괄 로딩: 중복 코드를 합친 뒤 한 번에 동기화하고,
+# (날짜 x 종목) 으로 정렬된 패널을 돌려줍니다. 컬럼은 (필드, 종목코드) 2단 구조.
+# ------------------------------------------------------------------------------
+def load_price_panel(codes, days=365, max_workers=10):
+    unique = list(dict.fromkeys(str(c) for c in codes if c))
+    if not unique: return pd.DataFrame()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda c: sync_history(c, days), unique))
+    df = _read_bars(unique, days)
+    if df.empty: return pd.DataFrame()
+    panel = df.pivot(index="Date", columns="Code", values=COLUMNS)
+    panel.columns.names = ["Field", "Code"]
+    return panel
+
+def panel_history(panel, code):
+    # 패널에서 한 종목의 history(DataFrame)만 잘라내기. 없으면 None
+    if panel is None or panel.empty or code not in panel.columns.get_level_values("Code"): return None
+    df = panel.xs(code, axis=1, level="Code")
+    extra = [c for c in df.columns if c not in COLUMNS]
+    df = df[COLUMNS + extra].dropna(subset=["Close"])
+    df.columns.name = None
+    return df
@@ -0,0 +1,169 @@
+import time
+import threading
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+# ------------------------------------------------------------------------------
+# 구글 시트 공용 연결 (modules/db.py, data_loader.py)
+# - 인증된 gspread 클라이언트, 스프레드시트, 워크시트 핸들을 프로세스에 하나씩만 만들어 재사용합니다.
+# - REAUTH_SEC 가 지나면 기존 클라이언트를 계속 쓰면서 백그라운드에서 새로 인증해 갈아끼웁니다.
+# - 워크시트 내용(values)을 ROWS_TTL 동안 들고 있고, 같이 만든 이름→행 번호 표로 서버 find 없이 찾습니다.
+# - 쓰기는 spreadsheet.batch_update 요청 하나로 묶고, 끝나면 들고 있던 values 도 같이 고칩니다.
+# ------------------------------------------------------------------------------
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+REAUTH_SEC = 45 * 60  # 액세스 토큰 수명(60분)보다 먼저
+ROWS_TTL = 60
+
+_books = {}
+_books_lock = threading.Lock()
+
+def _cell(value):
+    if isinstance(value, bool): return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)): return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": "" if value is None else str(value)}}
+
+def row_data(values):
+    return {"values": [_cell(v) for v in values]}
+
+def _row_index(values):
+    # {첫 열 이름: values 인덱스} (머리행 제외, 같은 이름이 여러 번이면 첫 행)
+    index = {}
+    for i, row in enumerate(values):
+        if i and row and row[0] not in index: index[row[0]] = i
+    return index
+
+def _same(a, b):
+    # 시트에는 표시 문자열로 들어 있으므로 "70000" 과 70000.0 은 같은 값
+    a, b = str(a).strip(), str(b).strip()
+    if a == b: return True
+    try: return float(a.replace(",", "")) == float(b)
+    except: return False
+
+def _same_row(old, new):
+    old = list(old) + [""] * (len(new) - len(old))
+    return all(_same(o, n) for o, n in zip(old, new))
+
+class SheetBook:
+    def __init__(self, creds_dict, open_fn):
+        # open_fn(client) -> gspread Spreadsheet (open_by_url / open 등 호출하는 쪽 방식 그대로)
+        self.creds_dict = creds_dict
+        self.open_fn = open_fn
+        self._lock = threading.RLock()
+        self._doc = None
+        self._worksheets = {}
+        self._rows = {}  # {시트 이름: (values, 읽은 시각)}
+        self._row_index = {}  # {시트 이름: {이름: values 인덱스}} (_rows 와 같이 갱신)
+        self._authed_at = 0.0
+        self._reauthing = False
+
+    def _connect(self):
+        creds = ServiceAccountCredentials.from_json_keyfile_dict(self.creds_dict, SCOPE)
+        doc = self.open_fn(gspread.authorize(creds))
+        with self._lock:
+            self._doc, self._worksheets, self._authed_at = doc, {}, time.time()
+        return doc
+
+    def _reauth_in_background(self):
+        with self._lock:
+            if self._reauthing: return
+            self._reauthing = True
+        def run():
+            try: self._connect()
+            except Exception as e: print(f"구글 시트 재인증 에러: {e}")
+            finally:
+                with self._lock: self._reauthing = False
+        threading.Thread(target=run, daemon=True).start()
+
+    def doc(self):
+        with self._lock: doc, age = self._doc, time.time() - self._authed_at
+        if doc is None: return self._connect()
+        if age > REAUTH_SEC: self._reauth_in_background()
+        return doc
+
+    def worksheet(self, title):
+        doc = self.doc()
+        with self._lock: ws = self._worksheets.get(title)
+        if ws is None:
+            ws = doc.worksheet(title)
+            with self._lock: self._worksheets[title] = ws
+        return ws
+
+    def values(self, title, refresh=False):
+        # 머리행 포함 전체 값 (행 번호 = 인덱스 + 1)
+        with self._lock: cached = self._rows.get(title)
+        if cached and not refresh and time.time() - cached[1] < ROWS_TTL: return cached[0]
+        values = self.worksheet(title).get_all_values()
+        self.set_values(title, values)
+        return values
+
+    def records(self, title):
+        values = self.values(title)
+        if not values: return []
+        header = values[0]
+        return [dict(zip(header, row + [""] * (len(header) - len(row)))) for row in values[1:]]
+
+    def find_row(self, title, name):
+        # 첫 열이 name 인 행의 values 인덱스 (머리행 제외), 없으면 None
+        self.values(title)  # 오래됐으면 다시 읽으면서 표도 새로 만듦
+        with self._lock: return self._row_index.get(title, {}).get(name)
+
+    def invalidate(self, title=None):
+        with self._lock:
+            if title is None: self._rows.clear(); self._row_index.clear()
+            else: self._rows.pop(title, None); self._row_index.pop(title, None)
+
+    def set_values(self, title, values):
+        index = _row_index(values)
+        with self._lock: self._rows[title], self._row_index[title] = (values, time.time()), index
+
+    def batch_update(self, requests):
+        if not requests: return None
+        try: return self.doc().batch_update({"requests": requests})
+        except Exception:
+            # 실패하면 들고 있던 values 가 시트와 어긋났을 수 있으므로 다음에 다시 읽음
+            self.invalidate()
+            raise
+
+    def diff_requests(self, title, header, rows):
+        # 마지막으로 본 시트 내용 → (머리행 + rows) 로 바꾸는 최소 요청 목록과 바뀐 뒤의 values
+        # 순서: 수정(원래 행 번호) → 삭제(아래 행부터) → 추가(맨 끝). batch 안에서 차례로 적용됨
+        values = self.values(title)
+        wanted = {str(r[0]): r for r in rows}
+        requests, deletes, seen = [], [], set()
+        if not values or not _same_row(values[0], header): requests.append(self.update_request(title, 0, header))
+        for i, old in enumerate(values[1:], start=1):
+            name = str(old[0]).strip() if old else ""
+            if not name or name not in wanted or name in seen: deletes.append(i); continue
+            seen.add(name)
+            if not _same_row(old, wanted[name]): requests.append(self.update_request(title, i, wanted[name]))
+        requests += [self.delete_request(title, i) for i in reversed(deletes)]
+        appends = [r for r in rows if str(r[0]) not in seen]
+        if appends: requests.append(self.append_request(title, appends))
+
+        new_values, kept = [[str(v) for v in header]], set()
+        for old in values[1:]:
+            name = str(old[0]).strip() if old else ""
+            if name in wanted and name not in kept:
+                kept.add(name); new_values.append([str(v) for v in wanted[name]])
+        new_values += [[str(v) for v in r] for r in appends]
+        return requests, new_values
+
+    # --- batch_update 요청 만들기 (row 는 0부터, 머리행 = 0) ---
+    def update_request(self, title, row, values, col=0):
+        return {"updateCells": {
+            "start": {"sheetId": self.worksheet(title).id, "rowIndex": row, "columnIndex": col},
+            "rows": [row_data(values)], "fields": "userEnteredValue"}}
+
+    def append_request(self, title, rows):
+        return {"appendCells": {"sheetId": self.worksheet(title).id, "rows": [row_data(r) for r in rows], "fields": "userEnteredValue"}}
+
+    def delete_request(self, title, row):
+        return {"deleteDimension": {"range": {"sheetId": self.worksheet(title).id, "dimension": "ROWS", "startIndex": row, "endIndex": row + 1}}}
+
+def get_book(key, creds_dict, open_fn):
+    # key 별로 프로세스에 하나 (세션마다 다시 인증하지 않음)
+    with _books_lock:
+        book = _books.get(key)
+        if book is None:
+            book = _books[key] = SheetBook(creds_dict, open_fn)
+        return book
@@ -0,0 +1,204 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+from modules.paths import data_path
+from modules.github_store import merge3, normalize, EMPTY
+
+# ------------------------------------------------------------------------------
+# 포트폴리오/관심종목 저장소 공통 인터페이스
+# - 모든 백엔드는 load() -> {"portfolio": {...}, "watchlist": {...}} 와 save(data, base=None, wait=False) 를 가집니다.
+#   base 는 이 데이터를 읽어 왔던 시점의 내용 (있으면 그사이 다른 곳의 변경분과 3-way 병합)
+#   wait 는 나중에 모아서 커밋하는 백엔드(github)에서 커밋까지 기다릴지 여부. 그 상태는 store_status() 로 확인
+# - sqlite : 로컬 SQLite (code/name 인덱스). 네트워크 없이 읽고 씀
+# - json   : 로컬 JSON 파일 (my_watchlist_v7.json 형식)
+# - github / sheets : 호출하는 쪽(app)이 만들어서 넘겨줌 (비밀키가 필요하므로)
+# - ReplicatedStore : 주 저장소에 먼저 쓰고, 나머지(복제본)에는 백그라운드에서 최신본을 밀어 넣음
+# 사용할 백엔드는 STORAGE_BACKEND, 복제본은 STORAGE_REPLICAS ("github,sheets") 설정으로 고릅니다.
+# ------------------------------------------------------------------------------
+SQLITE_FILE = "portfolio.db"
+JSON_FILE = "my_watchlist_v7.json"
+CATEGORIES = ("portfolio", "watchlist")
+
+def _empty():
+    return copy.deepcopy(EMPTY)
+
+class SQLiteStore:
+    def __init__(self, path=None):
+        self.path = path or data_path(SQLITE_FILE)
+        self._lock = threading.RLock()
+        self._conn = None
+
+    def _get_conn(self):
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS holdings (
+                        category TEXT NOT NULL, name TEXT NOT NULL, code TEXT NOT NULL,
+                        buy_price REAL, extra TEXT, updated_at REAL,
+                        PRIMARY KEY (category, name)
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_holdings_code ON holdings (code);
+                    CREATE INDEX IF NOT EXISTS idx_holdings_name ON holdings (name);
+                """)
+                self._conn = conn
+            return self._conn
+
+    @staticmethod
+    def _info(code, buy_price, extra):
+        info = {"code": code}
+        if buy_price is not None: info["buy_price"] = buy_price
+        if extra: info.update(json.loads(extra))
+        return info
+
+    @staticmethod
+    def _row(category, name, info):
+        extra = {k: v for k, v in info.items() if k not in ("code", "buy_price")}
+        return (category, name, str(info.get("code", "")), info.get("buy_price"),
+                json.dumps(extra, ensure_ascii=False) if extra else None, time.time())
+
+    def load(self):
+        data = _empty()
+        with self._lock:
+            rows = self._get_conn().execute("SELECT category, name, code, buy_price, extra FROM holdings ORDER BY rowid").fetchall()
+        for category, name, code, buy_price, extra in rows:
+            data.setdefault(category, {})[name] = self._info(code, buy_price, extra)
+        return data
+
+    def save(self, data, base=None, wait=False):
+        try:
+            with self._lock:
+                current = self.load()
+                target = merge3(base, normalize(data), current) if base is not None else normalize(data)
+                conn = self._get_conn()
+                with conn:
+                    for category in set(current) | set(target):
+                        old, new = current.get(category) or {}, target.get(category) or {}
+                        if not isinstance(new, dict): continue
+                        gone = [(category, n) for n in old if n not in new]
+                        if gone: conn.executemany("DELETE FROM holdings WHERE category=? AND name=?", gone)
+                        changed = [self._row(category, n, info) for n, info in new.items() if old.get(n) != info]
+                        if changed: conn.executemany("INSERT OR REPLACE INTO holdings VALUES (?, ?, ?, ?, ?, ?)", changed)
+            return True
+        except Exception as e:
+            print(f"SQLite 저장 에러: {e}")
+            return False
+
+    def find_by_code(self, code):
+        with self._lock:
+            rows = self._get_conn().execute("SELECT category, name, code, buy_price, extra FROM holdings WHERE code=?", (str(code),)).fetchall()
+        return [(c, n, self._info(code, b, e)) for c, n, code, b, e in rows]
+
+    def find_by_name(self, name):
+        with self._lock:
+            rows = self._get_conn().execute("SELECT category, name, code, buy_price, extra FROM holdings WHERE name=?", (name,)).fetchall()
+        return [(c, n, self._info(code, b, e)) for c, n, code, b, e in rows]
+
+class JSONFileStore:
+    def __init__(self, path=JSON_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self):
+        if not os.path.exists(self.path): return _empty()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f: return normalize(json.load(f))
+        except Exception as e:
+            print(f"파일 읽기 에러: {e}")
+            return _empty()
+
+    def save(self, data, base=None, wait=False):
+        try:
+            with self._lock:
+                target = merge3(base, normalize(data), self.load()) if base is not None else normalize(data)
+                with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(target, f, ensure_ascii=False, indent=4)
+                os.replace(self.path + ".tmp", self.path)
+            return True
+        except Exception as e:
+            print(f"파일 저장 에러: {e}")
+            return False
+
+class CallableStore:
+    # load_fn() / save_fn(data) 로 된 기존 저장 함수(구글 시트 등)를 인터페이스에 맞춤
+    def __init__(self, load_fn, save_fn):
+        self.load_fn, self.save_fn = load_fn, save_fn
+
+    def load(self):
+        return normalize(self.load_fn())
+
+    def save(self, data, base=None, wait=False):
+        if base is not None: data = merge3(base, normalize(data), self.load())
+        return bool(self.save_fn(data))
+
+class ReplicatedStore:
+    def __init__(self, primary, replicas=()):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self._cond = threading.Condition()
+        self._queued = None
+        self._worker = None
+        self.stats = {"replicated": 0, "errors": 0, "last_error": ""}
+
+    def load(self):
+        data = self.primary.load()
+        if any(data.get(c) for c in CATEGORIES): return data
+        # 주 저장소가 비어 있으면(첫 실행) 복제본 내용으로 채움
+        for replica in self.replicas:
+            try:
+                seed = replica.load()
+                if any(seed.get(c) for c in CATEGORIES):
+                    self.primary.save(seed)
+                    return seed
+            except Exception as e: print(f"복제본 읽기 에러: {e}")
+        return data
+
+    def save(self, data, base=None, wait=False):
+        if not self.primary.save(data, base, wait): return False
+        if self.replicas:
+            with self._cond:
+                self._queued = self.primary.load()  # 여러 번 저장돼도 마지막 내용만 복제
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._replicate, daemon=True)
+                    self._worker.start()
+                self._cond.notify()
+        return True
+
+    def _replicate(self):
+        while True:
+            with self._cond:
+                while self._queued is None: self._cond.wait()
+                data, self._queued = self._queued, None
+            for replica in self.replicas:
+                try:
+                    if not replica.save(data, wait=True): raise Exception(f"{type(replica).__name__} 저장 실패")
+                    self.stats["replicated"] += 1
+                except Exception as e:
+                    print(f"복제본 저장 에러: {e}")
+                    self.stats["errors"] += 1; self.stats["last_error"] = str(e)
+
+def open_store(backend, replicas=(), factories=None):
+    # factories: {"github": 함수, "sheets": 함수, ...} 호출하는 쪽에서 추가로 넘기는 백엔드
+    available = {"sqlite": SQLiteStore, "json": JSONFileStore}
+    available.update(factories or {})
+    # 함수가 None 을 돌려주면(키가 없는 등) 그 백엔드는 건너뜀. 주 저장소를 못 쓰면 로컬 SQLite
+    def build(name):
+        try: return available[name]() if name in available else None
+        except Exception as e:
+            print(f"저장소 '{name}' 준비 실패: {e}")
+            return None
+    primary = build(backend) or SQLiteStore()
+    others = [s for s in (build(r) for r in replicas if r and r != backend) if s is not None]
+    return ReplicatedStore(primary, others) if others else primary
+
+def store_status(store):
+    # ("saved" / "pending" / "failed", 마지막 에러). 바로 쓰는 백엔드는 항상 saved
+    store = getattr(store, "primary", store)
+    return store.status() if hasattr(store, "status") else ("saved", "")
+
+def parse_replicas(value):
+    return [v.strip().lower() for v in str(value or "").split(",") if v.strip()]
@@ -0,0 +1,118 @@
+import math
+from collections import deque
+
+# ------------------------------------------------------------------------------
+# 스트리밍 지표 상태 (daily_bot 용)
+# - 확정된 일봉만 commit() 으로 누적하고, 장중 미완성 봉은 preview() 로 계산만 합니다.
+# - 이동합/제곱합, RSI 상승/하락합, MACD EMA 값을 들고 있어 새 봉 하나당 O(1) 갱신.
+# - to_dict()/from_dict() 로 상태 파일(modules/bot_state.py)에 저장해 다음 실행에서 이어서 씁니다.
+# ------------------------------------------------------------------------------
+class IndicatorState:
+    def __init__(self, window=20, rsi_window=14, fast=12, slow=26, signal=9):
+        self.window = window
+        self.rsi_window = rsi_window
+        self.fast, self.slow, self.signal = fast, slow, signal
+        self.last_date = None
+        self.last_close = None
+        self.shift = None  # 제곱합 자릿수 손실 방지용 기준값
+        self.closes = deque(maxlen=window)
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.gains = deque(maxlen=rsi_window)
+        self.losses = deque(maxlen=rsi_window)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.ema_fast = None
+        self.ema_slow = None
+        self.ema_signal = None
+
+    @staticmethod
+    def _ema(prev, x, span):
+        if prev is None: return x
+        alpha = 2.0 / (span + 1)
+        return alpha * x + (1 - alpha) * prev
+
+    def _next_values(self, close):
+        # close 를 최신 봉으로 붙였을 때의 (이동합, 제곱합, 상승합, 하락합, EMA들)
+        d = close - self.shift
+        s, sq = self.sum + d, self.sumsq + d * d
+        if len(self.closes) == self.window:
+            old = self.closes[0] - self.shift
+            s, sq = s - old, sq - old * old
+        delta = close - self.last_close if self.last_close is not None else 0.0
+        g, l = max(delta, 0.0), max(-delta, 0.0)
+        gs, ls = self.gain_sum + g, self.loss_sum + l
+        if len(self.gains) == self.rsi_window:
+            gs, ls = gs - self.gains[0], ls - self.losses[0]
+        ef = self._ema(self.ema_fast, close, self.fast)
+        es = self._ema(self.ema_slow, close, self.slow)
+        macd = ef - es
+        sig = self._ema(self.ema_signal, macd, self.signal)
+        return s, sq, g, l, gs, ls, ef, es, sig
+
+    def commit(self, date, close):
+        close = float(close)
+        if self.shift is None: self.shift = close
+        s, sq, g, l, gs, ls, ef, es, sig = self._next_values(close)
+        self.closes.append(close); self.sum, self.sumsq = s, sq
+        self.gains.append(g); self.losses.append(l); self.gain_sum, self.loss_sum = gs, ls
+        self.ema_fast, self.ema_slow, self.ema_signal = ef, es, sig
+        self.last_date, self.last_close = str(date), close
+
+    def preview(self, close):
+        # 상태를 바꾸지 않고, close 를 최신 봉으로 가정한 지표값 반환
+        close = float(close)
+        if self.shift is None: self.shift = close
+        s, sq, g, l, gs, ls, ef, es, sig = self._next_values(close)
+        nan = float("nan")
+        res = {"close": close, "ma20": nan, "std": nan, "upper": nan, "lower": nan, "rsi": nan, "macd": ef - es, "macd_signal": sig}
+        if len(self.closes) + 1 >= self.window:
+            w = self.window
+            ma = s / w + self.shift
+            std = math.sqrt(max((sq - s * s / w) / (w - 1), 0.0))
+            res.update({"ma20": ma, "std": std, "upper": ma + std * 2, "lower": ma - std * 2})
+        if len(self.gains) + 1 >= self.rsi_window:
+            avg_g, avg_l = gs / self.rsi_window, ls / self.rsi_window
+            if avg_l > 0: res["rsi"] = 100 - (100 / (1 + avg_g / avg_l))
+            elif avg_g > 0: res["rsi"] = 100.0
+        return res
+
+    def _matches(self, rows):
+        # 누적된 closes 가 df 의 같은 날짜 종가와 같은지 (분할/배당으로 수정주가가 바뀌면 False)
+        past = [float(c) for d, c in rows if d <= self.last_date]
+        if not past or not any(d == self.last_date for d, _ in rows): return False
+        n = min(len(self.closes), len(past))
+        return all(abs(a - b) <= max(abs(a) * 1e-4, 1e-6) for a, b in zip(list(self.closes)[-n:], past[-n:]))
+
+    def sync(self, df):
+        # df: 일봉(Close) DataFrame. last_date 이후 봉 중 마지막(미완성일 수 있음)을 뺀 나머지를 commit,
+        # 마지막 봉 기준 지표를 반환. 새 봉이 없으면 None
+        # 누적된 종가가 df 와 다르면 지금까지의 상태를 버리고 df 전체로 다시 쌓음
+        rows = [(idx.strftime("%Y-%m-%d"), row['Close']) for idx, row in df.iterrows()]
+        if self.last_date is not None and not self._matches(rows):
+            self.__init__(self.window, self.rsi_window, self.fast, self.slow, self.signal)
+        rows = [r for r in rows if self.last_date is None or r[0] > self.last_date]
+        if not rows: return None
+        for date, close in rows[:-1]: self.commit(date, close)
+        return self.preview(rows[-1][1])
+
+    def to_dict(self):
+        return {
+            "window": self.window, "rsi_window": self.rsi_window,
+            "fast": self.fast, "slow": self.slow, "signal": self.signal,
+            "last_date": self.last_date, "last_close": self.last_close, "shift": self.shift,
+            "closes": list(self.closes), "sum": self.sum, "sumsq": self.sumsq,
+            "gains": list(self.gains), "losses": list(self.losses),
+            "gain_sum": self.gain_sum, "loss_sum": self.loss_sum,
+            "ema_fast": self.ema_fast, "ema_slow": self.ema_slow, "ema_signal": self.ema_signal,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        st = cls(d["window"], d["rsi_window"], d["fast"], d["slow"], d["signal"])
+        st.last_date, st.last_close, st.shift = d["last_date"], d["last_close"], d["shift"]
+        st.closes.extend(d["closes"]); st.sum, st.sumsq = d["sum"], d["sumsq"]
+        st.gains.extend(d["gains"]); st.losses.extend(d["losses"])
+        st.gain_sum, st.loss_sum = d["gain_sum"], d["loss_sum"]
+        st.ema_fast, st.ema_slow, st.ema_signal = d["ema_fast"], d["ema_slow"], d["ema_signal"]
+        return st
@@ -0,0 +1,103 @@
+from collections import Counter
+
+# ------------------------------------------------------------------------------
+# KRX 종목 검색 인덱스
+# 상장 목록(DataFrame: Code, Name, ...)이 바뀔 때 한 번만 만들고, 검색마다 전체 표를 훑지 않습니다.
+# - 코드→행, 이름→코드 : dict (O(1))
+# - 이름 접두어 검색     : trie, 노드마다 (이름 길이, 원래 순서)로 정렬된 후보를 들고 있음 (O(k))
+# - 부분 문자열/오타 검색 : 1·2글자 n-gram 역색인 (예: "삼성전" → 삼성전자)
+# ------------------------------------------------------------------------------
+def _norm(text):
+    return str(text).replace(" ", "").lower()
+
+def _grams(text):
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+class SymbolIndex:
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True) if df is not None else None
+        self.codes, self.names, self._keys = [], [], []
+        self._by_code, self._by_name, self._by_norm = {}, {}, {}
+        self._trie = {}
+        self._postings = {}
+        if self.df is None or self.df.empty or 'Code' not in self.df or 'Name' not in self.df: return
+        self.codes = [str(c) for c in self.df['Code']]
+        self.names = [str(n) for n in self.df['Name']]
+        self._keys = [_norm(n) for n in self.names]
+        for i, (code, name, key) in enumerate(zip(self.codes, self.names, self._keys)):
+            self._by_code.setdefault(code, i)
+            self._by_name.setdefault(name, i)
+            self._by_norm.setdefault(key, i)
+            for g in _grams(key): self._postings.setdefault(g, []).append(i)
+        for i in sorted(range(len(self.names)), key=lambda i: (len(self._keys[i]), i)):
+            node = self._trie
+            for ch in self._keys[i]:
+                node = node.setdefault(ch, {None: []})
+                node[None].append(i)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def empty(self):
+        return not self.codes
+
+    def _pair(self, i):
+        return self.names[i], self.codes[i]
+
+    def row(self, code):
+        i = self._by_code.get(str(code))
+        return self.df.iloc[i] if i is not None else None
+
+    def has_code(self, code):
+        return str(code) in self._by_code
+
+    def name_of(self, code):
+        i = self._by_code.get(str(code))
+        return self.names[i] if i is not None else None
+
+    def code_of(self, name):
+        i = self._by_name.get(str(name).strip())
+        if i is None: i = self._by_norm.get(_norm(name))
+        return self.codes[i] if i is not None else None
+
+    def prefix(self, query, limit=10):
+        node = self._trie
+        for ch in _norm(query):
+            node = node.get(ch)
+            if node is None: return []
+        return [self._pair(i) for i in node.get(None, [])[:limit]] if node is not self._trie else []
+
+    def contains(self, query, limit=10):
+        # 부분 문자열 포함 (원래 목록 순서)
+        key = _norm(query)
+        if not key: return []
+        grams = _grams(key)
+        rare = min(grams, key=lambda g: len(self._postings.get(g, [])))
+        hits = [i for i in self._postings.get(rare, []) if key in self._keys[i]]
+        return [self._pair(i) for i in hits[:limit]]
+
+    def fuzzy(self, query, limit=5, min_score=0.5):
+        # n-gram Dice 유사도
+        key = _norm(query)
+        if not key: return []
+        grams = _grams(key)
+        common = Counter()
+        for g in grams: common.update(self._postings.get(g, []))
+        scored = []
+        for i, c in common.items():
+            score = 2.0 * c / (len(grams) + len(_grams(self._keys[i])))
+            if score >= min_score: scored.append((-score, len(self._keys[i]), i))
+        return [self._pair(i) for _, _, i in sorted(scored)[:limit]]
+
+    def find(self, keyword):
+        # (이름, 코드) 또는 (None, None): 정확한 이름 → 코드 → 접두어 → 포함 → 유사
+        keyword = str(keyword).strip()
+        if not keyword or self.empty: return None, None
+        code = self.code_of(keyword)
+        if code: return self.names[self._by_code[code]], code
+        if keyword.isdigit() and keyword in self._by_code: return self._pair(self._by_code[keyword])
+        for search in (self.prefix, self.contains, self.fuzzy):
+            hits = search(keyword, limit=1)
+            if hits: return hits[0]
+        return None, None
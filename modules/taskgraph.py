@@ -0,0 +1,47 @@
+import time
+import concurrent.futures
+
+# ------------------------------------------------------------------------------
+# 작은 의존성 그래프 실행기
+# tasks = {"이름": (함수, ["의존 작업", ...])}
+# - 의존 작업이 없는 것은 한꺼번에 시작하고, 나머지는 의존 작업이 끝나는 즉시 시작합니다.
+# - 함수는 의존 작업 결과를 적힌 순서대로 인자로 받습니다.
+# - 실패한 작업(과 그 작업에 의존하는 작업)의 결과 자리에는 예외 객체가 들어갑니다.
+# ------------------------------------------------------------------------------
+# 잎(leaf) 작업 전용 공용 풀: 작업 안에서 다시 이 풀에 제출하지 않으므로 교착이 없습니다.
+_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="taskgraph")
+
+def run_task_graph(tasks, timeout=None):
+    results = {}
+    running = {}
+    pending = dict(tasks)
+    deadline = time.time() + timeout if timeout else None
+
+    def submit_ready():
+        progressed = True
+        while progressed:
+            progressed = False
+            for name, (fn, deps) in list(pending.items()):
+                if not all(d in results for d in deps): continue
+                del pending[name]
+                progressed = True
+                failed = [results[d] for d in deps if isinstance(results[d], Exception)]
+                if failed: results[name] = failed[0]
+                else: running[_POOL.submit(fn, *[results[d] for d in deps])] = name
+
+    submit_ready()
+    while running:
+        remaining = max(deadline - time.time(), 0) if deadline else None
+        done, _ = concurrent.futures.wait(list(running), timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED)
+        if not done:
+            for name in list(running.values()) + list(pending): results[name] = TimeoutError(f"{name} 시간 초과")
+            running.clear(); pending.clear()
+            break
+        for fut in done:
+            name = running.pop(fut)
+            try: results[name] = fut.result()
+            except Exception as e: results[name] = e
+        submit_ready()
+
+    for name in pending: results[name] = KeyError(f"{name}: 알 수 없는 의존 작업")
+    return results
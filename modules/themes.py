@@ -0,0 +1,167 @@
+import os
+import re
+import json
+import time
+import threading
+import concurrent.futures
+from bs4 import BeautifulSoup
+from modules.net import http_get
+from modules.paths import data_path
+
+# ------------------------------------------------------------------------------
+# 네이버 금융 테마 인덱스
+# - 테마 목록 페이지와 테마별 종목 페이지를 병렬로 긁어서 .quant_cache/naver_themes.json 에 저장합니다.
+# - 메모리에는 테마→종목(역색인)과 종목코드→테마 두 방향 표를 들고, 검색은 네트워크 없이 처리합니다.
+# - REFRESH_SEC 보다 오래된 인덱스는 백그라운드 스레드가 한 번만 다시 만듭니다.
+# - 인덱스가 아직 없을 때(첫 실행)는 검색어에 맞는 테마 하나만 바로 긁어서 답합니다.
+# ------------------------------------------------------------------------------
+BASE_URL = "https://finance.naver.com"
+LIST_URL = BASE_URL + "/sise/theme.naver?&page={page}"
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+INDEX_FILE = "naver_themes.json"
+REFRESH_SEC = 12 * 3600
+RETRY_SEC = 600
+MAX_PAGES = 10
+MAX_WORKERS = 8  # finance.naver.com 커넥션 풀(10)보다 작게
+
+_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_refreshing = False
+_last_attempt = 0.0
+_themes = None      # {테마명: [{"code", "name", "price"}, ...]} (네이버 목록 순서)
+_by_code = {}       # {종목코드: [테마명, ...]}
+_built_at = 0.0
+
+def _get_html(url):
+    res = http_get(url, headers=HEADERS)
+    res.encoding = 'EUC-KR'
+    return res.text
+
+def _parse_theme_list(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return [(a.text.strip(), BASE_URL + a['href']) for a in soup.select('table.type_1 tr td.col_type1 a')]
+
+def _parse_last_page(html):
+    m = re.findall(r"theme\.naver\?&?page=(\d+)", html)
+    return max([int(p) for p in m] + [1])
+
+def _parse_members(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    stocks = []
+    for row in soup.select('div.box_type_l table.type_5 tr'):
+        name_tag = row.select_one('td.name a')
+        if not name_tag: continue
+        code = name_tag['href'].split('=')[-1]
+        price_txt = row.select('td.number')[0].text.strip().replace(',', '') if row.select('td.number') else ''
+        try: price = int(price_txt)
+        except: price = 0
+        stocks.append({"code": code, "name": name_tag.text.strip(), "price": price})
+    return stocks
+
+def _fetch_theme_links(pool):
+    first = _get_html(LIST_URL.format(page=1))
+    last = min(_parse_last_page(first), MAX_PAGES)
+    pages = [first] + list(pool.map(lambda p: _get_html(LIST_URL.format(page=p)), range(2, last + 1)))
+    links = []
+    for html in pages: links.extend(_parse_theme_list(html))
+    return list(dict.fromkeys(links))
+
+def build_theme_index():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        links = _fetch_theme_links(pool)
+        def fetch(link):
+            try: return _parse_members(_get_html(link[1]))
+            except Exception as e:
+                print(f"테마 종목 조회 에러 ({link[0]}): {e}")
+                return None
+        members = list(pool.map(fetch, links))
+    return {name: m for (name, _), m in zip(links, members) if m is not None}
+
+def _set_index(themes, built_at):
+    global _themes, _by_code, _built_at
+    by_code = {}
+    for name, members in themes.items():
+        for s in members: by_code.setdefault(s['code'], []).append(name)
+    with _lock:
+        _themes, _by_code, _built_at = themes, by_code, built_at
+
+def _save_index():
+    try:
+        path = data_path(INDEX_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"built_at": _built_at, "themes": _themes}, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+    except Exception as e:
+        print(f"테마 인덱스 저장 에러: {e}")
+
+def _load_index():
+    try:
+        path = data_path(INDEX_FILE)
+        if not os.path.exists(path): return False
+        with open(path, "r", encoding="utf-8") as f: d = json.load(f)
+        if not d.get("themes"): return False
+        _set_index(d["themes"], d.get("built_at", 0.0))
+        return True
+    except Exception as e:
+        print(f"테마 인덱스 읽기 에러: {e}")
+        return False
+
+def refresh_theme_index():
+    try:
+        themes = build_theme_index()
+        if not themes: return False
+        _set_index(themes, time.time())
+        _save_index()
+        return True
+    except Exception as e:
+        print(f"테마 인덱스 생성 에러: {e}")
+        return False
+
+def _refresh_in_background():
+    global _refreshing, _last_attempt
+    with _refresh_lock:
+        if _refreshing or time.time() - _last_attempt < RETRY_SEC: return
+        _refreshing, _last_attempt = True, time.time()
+    def run():
+        global _refreshing
+        try: refresh_theme_index()
+        finally:
+            with _refresh_lock: _refreshing = False
+    threading.Thread(target=run, daemon=True).start()
+
+def _ensure_index():
+    # 인덱스 준비 여부. 오래됐거나 없으면 백그라운드 갱신 시작
+    if _themes is None: _load_index()
+    if _themes is None or time.time() - _built_at > REFRESH_SEC: _refresh_in_background()
+    return _themes is not None
+
+def _match(names, keyword):
+    keyword = keyword.strip()
+    if not keyword: return None
+    if keyword in names: return keyword
+    return next((n for n in names if keyword in n), None)
+
+def _find_theme_live(keyword):
+    # 인덱스가 없을 때: 목록 페이지를 병렬로 받아 첫 번째로 맞는 테마만 긁음
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        links = dict(_fetch_theme_links(pool))
+    name = _match(list(links), keyword)
+    if not name: return None, []
+    return name, _parse_members(_get_html(links[name]))
+
+def find_theme(keyword):
+    # (테마명, 종목 목록). 정확히 같은 테마명 우선, 없으면 검색어가 들어간 첫 테마
+    if _ensure_index():
+        themes = _themes  # 백그라운드 갱신으로 교체되더라도 같은 판본에서 조회
+        name = _match(list(themes), keyword)
+        return (name, list(themes[name])) if name else (None, [])
+    return _find_theme_live(keyword)
+
+def search_themes(keyword, limit=20):
+    if not _ensure_index(): return []
+    keyword = keyword.strip()
+    return [n for n in _themes if keyword and keyword in n][:limit]
+
+def themes_for_code(code):
+    if not _ensure_index(): return []
+    return list(_by_code.get(str(code), []))
@@ -1,8 +1,9 @@
-import FinanceDataReader as fdr
 import pandas as pd
-import datetime
 import streamlit as st
 import google.generativeai as genai
+from modules.price_store import load_history
+from modules.symbols import SymbolIndex
+from modules.krx_listing import load_listing, listing_version
 
 # 1. Gemini AI 설정
 def configure_genai():
@@ -17,30 +18,21 @@ def configure_genai():
         return False
 
 # 2. 종목 검색
-@st.cache_data(ttl=3600*24)
 def get_krx_list():
-    try:
-        df = fdr.StockListing('KRX')
-        return df[['Code', 'Name']]
-    except:
-        return pd.DataFrame()
+    df = load_listing()
+    return df[['Code', 'Name']] if not df.empty else pd.DataFrame()
+
+@st.cache_resource(max_entries=2)
+def build_symbol_index(version):
+    return SymbolIndex(get_krx_list())
+
+def get_symbol_index():
+    # 캐시된 인덱스를 쓰더라도 매번 거래일 확인 (날짜가 바뀌었으면 백그라운드 갱신 → 버전이 올라가면 새 인덱스)
+    load_listing()
+    return build_symbol_index(listing_version())
 
 def find_stock_code(keyword):
-    df = get_krx_list()
-    if df.empty: return None, None
-    keyword = keyword.strip()
-    
-    exact = df[df['Name'] == keyword]
-    if not exact.empty: return exact.iloc[0]['Name'], exact.iloc[0]['Code']
-    
-    if keyword.isdigit():
-        match = df[df['Code'] == keyword]
-        if not match.empty: return match.iloc[0]['Name'], match.iloc[0]['Code']
-        
-    contains = df[df['Name'].str.contains(keyword, case=False)]
-    if not contains.empty: return contains.iloc[0]['Name'], contains.iloc[0]['Code']
-    
-    return None, None
+    return get_symbol_index().find(keyword)
 
 # 3. AI 한줄평 (안전한 gemini-pro 사용)
 def get_ai_summary(name, price, change_rate, rsi, trend):
@@ -75,7 +67,7 @@ def analyze_basic(input_val, name_override=None, my_buy_price=0):
     final_name = name_override if name_override else found_name
 
     try:
-        df = fdr.DataReader(code, datetime.datetime.now() - datetime.timedelta(days=365))
+        df = load_history(code, days=365)
         if df.empty: return None
         
         df['MA20'] = df['Close'].rolling(20).mean()